@@ -0,0 +1,134 @@
+import time
+import heapq
+import argparse
+import numpy as np
+
+
+# Integer share allocation under a dollar budget. Each name has a unit cost, a
+# share cap and a weight; the result spends as much of the budget as possible
+# while staying close to the weighted split:
+#   1. water-fill the budget by weight, redistributing what capped names can't take;
+#   2. floor to whole shares;
+#   3. add one share per name by largest fractional remainder while it fits;
+#   4. exact 0/1 knapsack (in cents) over one more share of the best-placed
+#      names to use up the leftover;
+#   5. top up with whole shares, cheapest-behind-target first, until nothing fits.
+
+KNAPSACK_ITEMS = 64
+KNAPSACK_MAX_CENTS = 200_000
+
+
+def water_fill(budget: float, weights: np.ndarray, caps: np.ndarray) -> np.ndarray:
+    # Dollar targets proportional to weights, none above its cap, summing to
+    # min(budget, caps.sum()).
+    n = len(weights)
+    out = np.zeros(n)
+    w = np.where(caps > 0, np.maximum(weights, 0.0), 0.0)
+    if not n or budget <= 0 or w.sum() <= 0:
+        return out
+    # Names saturate in order of cap per unit weight; once those are fixed the
+    # rest share what is left by weight.
+    idx = np.flatnonzero(w > 0)
+    order = idx[np.argsort(caps[idx] / w[idx], kind="mergesort")]
+    wsum = np.cumsum(w[order][::-1])[::-1]
+    capsum = np.concatenate(([0.0], np.cumsum(caps[order])[:-1]))
+    level = (budget - capsum) / wsum
+    saturated = caps[order] / w[order] <= level
+    k = int(np.argmin(saturated)) if not saturated.all() else len(order)
+    out[order[:k]] = caps[order[:k]]
+    if k < len(order):
+        out[order[k:]] = w[order[k:]] * level[k]
+    return out
+
+
+def _knapsack(costs: np.ndarray, capacity: int) -> np.ndarray:
+    # 0/1 subset of costs (ints) with the largest total <= capacity.
+    n = len(costs)
+    reach = np.zeros((n + 1, capacity + 1), dtype=bool)
+    reach[0, 0] = True
+    for i, c in enumerate(costs):
+        reach[i + 1] = reach[i]
+        if c <= capacity:
+            reach[i + 1, c:] |= reach[i, :capacity + 1 - c]
+    best = int(np.flatnonzero(reach[n])[-1])
+    take = np.zeros(n, dtype=bool)
+    for i in range(n, 0, -1):
+        if not reach[i - 1, best]:
+            take[i - 1] = True
+            best -= int(costs[i - 1])
+    return take
+
+
+def allocate_shares(costs, budget: float, max_shares=None, weights=None) -> np.ndarray:
+    costs = np.asarray(costs, dtype=np.float64)
+    n = len(costs)
+    if not n or budget <= 0:
+        return np.zeros(n, dtype=np.int64)
+    valid = costs > 0
+    safe = np.where(valid, costs, 1.0)
+    caps = np.full(n, np.inf) if max_shares is None else np.asarray(max_shares, dtype=np.float64)
+    caps = np.where(valid, np.maximum(np.floor(caps), 0.0), 0.0)
+    w = np.ones(n) if weights is None else np.asarray(weights, dtype=np.float64)
+
+    target = water_fill(budget, w, np.minimum(caps * safe, budget))
+    ideal = target / safe
+    qty = np.minimum(np.floor(ideal + 1e-9), caps)
+    left = budget - float((qty * costs).sum())
+
+    # Largest remainder first.
+    room = qty < caps
+    for i in np.argsort(-(ideal - qty), kind="mergesort"):
+        if room[i] and costs[i] <= left + 1e-9 and ideal[i] - qty[i] > 1e-9:
+            qty[i] += 1
+            left -= costs[i]
+
+    # Exact fill of the leftover with one more share of the closest names.
+    cents = int(np.floor(left * 100 + 1e-6))
+    if 0 < cents <= KNAPSACK_MAX_CENTS:
+        cand = np.flatnonzero((qty < caps) & valid & (costs * 100 <= cents + 1e-6))
+        if len(cand):
+            cand = cand[np.argsort(qty[cand] * safe[cand] - target[cand], kind="mergesort")[:KNAPSACK_ITEMS]]
+            take = _knapsack(np.ceil(costs[cand] * 100 - 1e-6).astype(np.int64), cents)
+            qty[cand[take]] += 1
+            left -= float(costs[cand[take]].sum())
+
+    # Whole-share top-up while anything still fits.
+    heap = [(qty[i] * safe[i] - target[i], costs[i], i) for i in np.flatnonzero((qty < caps) & valid)]
+    heapq.heapify(heap)
+    while heap:
+        over, c, i = heapq.heappop(heap)
+        if c > left + 1e-9:
+            continue
+        qty[i] += 1
+        left -= c
+        if qty[i] < caps[i]:
+            heapq.heappush(heap, (over + c, c, i))
+    return qty.astype(np.int64)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark allocate_shares on random candidate sets")
+    ap.add_argument("--names", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    ap.add_argument("--trials", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    rng = np.random.default_rng(args.seed)
+    print(f"{'names':>7}{'ms/run':>10}{'spent':>9}{'naive':>9}")
+    for n in args.names:
+        secs, used, naive = 0.0, 0.0, 0.0
+        for _ in range(args.trials):
+            costs = np.round(rng.uniform(1.0, 400.0, n), 2)
+            caps = rng.integers(0, 500, n)
+            weights = rng.integers(1, 4, n).astype(float)
+            budget = float(rng.uniform(0.01, 0.5) * (costs * caps).sum())
+            t = time.perf_counter()
+            q = allocate_shares(costs, budget, caps, weights)
+            secs += time.perf_counter() - t
+            used += float((q * costs).sum()) / budget
+            even = np.minimum(np.floor(budget / n / costs), caps)
+            naive += float((even * costs).sum()) / budget
+        print(f"{n:>7}{secs / args.trials * 1000:>10.2f}{used / args.trials:>9.2%}{naive / args.trials:>9.2%}")
+
+
+if __name__ == "__main__":
+    main()
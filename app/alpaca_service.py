@@ -1,13 +1,40 @@
 import os
 
+from typing import Optional
 from alpaca_trade_api.rest import REST, TimeFrame
+from .api_cache import CachedREST
+from .instrumentation import InstrumentedClient, instrument_session
 
 
-def make_alpaca():
-    key = os.getenv("ALPACA_API_KEY")
-    secret = os.getenv("ALPACA_SECRET_KEY")
-    base = os.getenv("ALPACA_BASE_URL")
-    return REST(key, secret, base)
+def make_fake_alpaca():
+    # ALPACA_FAKE=1 for synthetic data, or a BarStore directory to replay recorded bars.
+    from .fake_alpaca import FakeREST
+    src = os.getenv("ALPACA_FAKE", "")
+    seed = int(os.getenv("ALPACA_FAKE_SEED", "0"))
+    latency = {"default": float(os.getenv("ALPACA_FAKE_LATENCY", "0"))}
+    if os.path.isdir(src):
+        return FakeREST.from_bar_store(src, seed=seed, latency=latency)
+    return FakeREST.synthetic(symbols=int(os.getenv("ALPACA_FAKE_SYMBOLS", "500")), seed=seed, latency=latency)
+
+
+def make_alpaca(cache: Optional[dict] = None):
+    if os.getenv("ALPACA_FAKE"):
+        rest = InstrumentedClient(make_fake_alpaca(), "alpaca")
+    else:
+        rest = REST(os.getenv("ALPACA_API_KEY"), os.getenv("ALPACA_SECRET_KEY"), os.getenv("ALPACA_BASE_URL"))
+        instrument_session(rest._session, "alpaca")
+        rest = InstrumentedClient(rest, "alpaca")
+    cache = cache or {}
+    if not cache.get("enabled", True):
+        return rest
+    return CachedREST(rest, ttls=cache.get("ttls"), max_entries=int(cache.get("max_entries", 1024)))
+
+
+def make_trade_stream(data_feed: str = "iex"):
+    if os.getenv("ALPACA_FAKE"):
+        raise RuntimeError("no trade update stream when ALPACA_FAKE is set")
+    from alpaca_trade_api.stream import Stream
+    return Stream(os.getenv("ALPACA_API_KEY"), os.getenv("ALPACA_SECRET_KEY"), os.getenv("ALPACA_BASE_URL"), data_feed=data_feed)
 
 
 def get_account(alpaca: REST):
@@ -47,5 +74,32 @@ def get_order(alpaca: REST, order_id: str):
     return alpaca.get_order(order_id)
 
 
+def list_orders(alpaca: REST, **kwargs):
+    return alpaca.list_orders(**kwargs)
+
+
+def cancel_all_orders(alpaca: REST):
+    return alpaca.cancel_all_orders()
+
+
+def close_all_positions(alpaca: REST):
+    return alpaca.close_all_positions()
+
+
 def get_bars_multi(alpaca: REST, symbols, timeframe: TimeFrame, limit: int = 20):
     return alpaca.get_bars(symbols, timeframe, limit=limit)
+
+
+def get_bars_since(alpaca: REST, symbols, timeframe: TimeFrame, start: str, end: Optional[str] = None):
+    return alpaca.get_bars(symbols, timeframe, start=start, end=end)
+
+
+def list_assets_by_symbol(alpaca: REST) -> dict:
+    # Served from the client's list_assets cache entry after the first call.
+    assets = alpaca.list_assets(status="active", asset_class="us_equity")
+    return {a.symbol: a for a in assets}
+
+
+def get_last_trade_prices(alpaca: REST, symbols) -> dict:
+    trades = alpaca.get_latest_trades(list(symbols))
+    return {s: float(t.price) for s, t in trades.items()}
@@ -0,0 +1,92 @@
+import time
+import threading
+
+from collections import OrderedDict, defaultdict
+from typing import Dict, Optional
+
+
+# Seconds each read endpoint may be served from memory. Anything not listed
+# (bars, orders, news) always goes to the network.
+DEFAULT_TTLS = {
+    "get_account": 5.0,
+    "list_positions": 5.0,
+    "get_clock": 30.0,
+    "get_asset": 3600.0,
+    "list_assets": 3600.0,
+    "get_latest_trade": 2.0,
+    "get_latest_trades": 2.0,
+}
+
+# Writes and the cached reads they make stale.
+INVALIDATES = {
+    "submit_order": ("get_account", "list_positions"),
+    "cancel_order": ("get_account", "list_positions"),
+    "cancel_all_orders": ("get_account", "list_positions"),
+    "close_position": ("get_account", "list_positions"),
+    "close_all_positions": ("get_account", "list_positions"),
+}
+
+
+def _freeze(v):
+    if isinstance(v, (list, tuple, set)):
+        return tuple(_freeze(x) for x in v)
+    if isinstance(v, dict):
+        return tuple(sorted((k, _freeze(x)) for k, x in v.items()))
+    return v
+
+
+class CachedREST:
+    def __init__(self, rest, ttls: Optional[Dict[str, float]] = None, max_entries: int = 1024):
+        self._rest = rest
+        self._ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self._max_entries = max(1, int(max_entries))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+
+    def __getattr__(self, name):
+        attr = getattr(self._rest, name)
+        if not callable(attr):
+            return attr
+        if name in INVALIDATES:
+            def write(*args, **kwargs):
+                try:
+                    return attr(*args, **kwargs)
+                finally:
+                    self.invalidate(*INVALIDATES[name])
+            return write
+        ttl = float(self._ttls.get(name, 0) or 0)
+        if ttl <= 0:
+            return attr
+
+        def read(*args, **kwargs):
+            key = (name, _freeze(args), _freeze(kwargs))
+            now = time.monotonic()
+            with self._lock:
+                hit = self._entries.get(key)
+                if hit is not None and hit[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits[name] += 1
+                    return hit[1]
+                self.misses[name] += 1
+            value = attr(*args, **kwargs)
+            with self._lock:
+                self._entries[key] = (time.monotonic() + ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+            return value
+        return read
+
+    def invalidate(self, *names: str) -> None:
+        with self._lock:
+            if not names:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[0] in names]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        names = sorted(set(self.hits) | set(self.misses))
+        return {n: {"hits": self.hits[n], "misses": self.misses[n]} for n in names}
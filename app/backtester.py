@@ -1,83 +1,161 @@
-import math
+import os
 import json
-import pandas as pd
 
-from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Tuple
-from .config_loader import load_settings
+from typing import Dict, Optional
 from .alpaca_service import make_alpaca
-from .universe_builder import auto_universe
-from .market_data import enrich_symbol
+from .bar_store import BarStore, day_number, day_string
+from .price_matrix import PriceMatrix
+from .universe_scoring import window_factor_table, rank_factors
 from .openai_agent import get_portfolio_prompt, ask_openai
+from . import llm_cache
+from . import metrics
 
 
-def _bars_close(alpaca, symbol: str, day: datetime) -> float:
-    start = day.replace(hour=0, minute=0, second=0, microsecond=0)
-    bars = alpaca.get_bars(symbol, "1Day", start.isoformat(), limit=2)
-    if not bars:
-        return 0.0
-    return float(bars[-1].c)
+# Settings the day-by-day replay reads. The rest of "universe." and "backtest."
+# only shape load_backtest_matrix, which runs once from the base settings, so a
+# sweep over them would return the same result at every point.
+BACKTEST_KEYS = (
+    "universe.min_price",
+    "universe.max_price",
+    "universe.min_avg_volume",
+    "universe.max_size",
+    "universe.avg_volume_days",
+    "universe.rank_weights.",
+    "budget.virtual_equity",
+    "budget.max_daily_allocation_abs",
+    "spread.target_positions",
+    "brackets.",
+)
 
 
-def _bars_open_next(alpaca, symbol: str, day: datetime) -> float:
-    nextday = day + timedelta(days=1)
-    bars = alpaca.get_bars(symbol, "1Day", day.isoformat(), limit=2)
-    if len(bars) < 2:
-        return float(bars[0].o) if bars else 0.0
-    return float(bars[-1].o)
+def uses_key(dotted: str) -> bool:
+    return any(dotted == k.rstrip(".") or (k.endswith(".") and dotted.startswith(k)) for k in BACKTEST_KEYS)
 
 
-def run_backtest(start_date: str, end_date: str, settings: dict) -> Dict:
-    alpaca = make_alpaca()
-    start = datetime.fromisoformat(start_date).replace(tzinfo=timezone.utc)
-    end = datetime.fromisoformat(end_date).replace(tzinfo=timezone.utc)
+def _bracket_exit(price: float, entry: float, peak: float, settings: dict) -> bool:
+    # Daily closes only: an exit fills at the close that crosses the level.
+    b = settings.get("brackets", {})
+    if not b.get("use_bracket", False) or entry <= 0:
+        return False
+    trail = float(b.get("trailing_stop_pct", 0.0))
+    if trail > 0:
+        return price <= peak * (1 - trail)
+    return price <= entry * (1 - float(b.get("stop_loss_pct", 0.05))) or price >= entry * (1 + float(b.get("take_profit_pct", 0.08)))
+
+
+def _store_dir(settings: dict) -> str:
+    return (
+        settings.get("backtest", {}).get("bar_store_dir")
+        or settings["universe"].get("bar_store_dir")
+        or os.path.join(settings["data_dir"], "bars")
+    )
+
+
+def load_backtest_matrix(start_date: str, end_date: str, settings: dict, alpaca=None) -> PriceMatrix:
+    # Loads every session the replay needs, plus the universe look-back window,
+    # once. With an Alpaca client the store is backfilled first; without one the
+    # backtest runs purely from what is already on disk.
+    u = settings["universe"]
+    bt = settings.get("backtest", {})
+    store = BarStore(_store_dir(settings))
+    days = int(u.get("avg_volume_days", 20))
+    start_day = day_number(start_date) - (days * 7 // 5 + 10)
+    end_day = day_number(end_date)
+    symbols = bt.get("symbols")
+    if alpaca is not None:
+        if not symbols:
+            exchanges = set(u["exchanges"])
+            assets = alpaca.list_assets(status="active", asset_class="us_equity")
+            symbols = [a.symbol for a in assets if a.exchange in exchanges and a.tradable]
+        store.backfill(
+            alpaca, symbols, start_day, end_day,
+            batch_size=int(u.get("batch_size", 200)),
+            concurrency=int(u.get("concurrency", 4)),
+            per_minute=float(u.get("requests_per_minute", 180))
+        )
+    elif not symbols:
+        symbols = store.symbols()
+    return PriceMatrix.from_store(store, symbols, start_day, end_day)
+
+
+def run_backtest(start_date: str, end_date: str, settings: dict, matrix: Optional[PriceMatrix] = None, offline: bool = False) -> Dict:
+    # The LLM cache settings apply to this replay only.
+    cache = settings.get("backtest", {}).get("llm_cache", {})
+    with llm_cache.configured(cache.get("mode"), cache.get("dir")):
+        return _replay(start_date, end_date, settings, matrix, offline)
+
+
+def _replay(start_date: str, end_date: str, settings: dict, matrix: Optional[PriceMatrix], offline: bool) -> Dict:
+    if matrix is None:
+        alpaca = None if offline else make_alpaca(settings.get("api_cache"))
+        matrix = load_backtest_matrix(start_date, end_date, settings, alpaca)
+    lo, hi = matrix.span(day_number(start_date), day_number(end_date))
+    if hi <= lo:
+        raise ValueError(f"No stored sessions between {start_date} and {end_date}")
+    days = int(settings["universe"].get("avg_volume_days", 20))
+    marks = matrix.marks()
     equity = float(settings["budget"]["virtual_equity"])
+    target_positions = int(settings.get("spread", {}).get("target_positions", 4))
     cash = equity
     positions = {}
+    # symbol -> (average entry price, highest close since entry)
+    entries = {}
     equity_curve = []
-    current_day = start
-    while current_day <= end:
-        uni = auto_universe(alpaca, settings)
+    traded = []
+    for i in range(lo, hi):
+        close_w, vol_w = matrix.window(i, days)
+        uni = rank_factors(window_factor_table(matrix.symbols, close_w, vol_w), settings)
+        px = marks[i]
+        spent = 0.0
+        for sym in list(positions):
+            price = float(px[matrix.column[sym]])
+            entry, peak = entries[sym]
+            peak = max(peak, price)
+            entries[sym] = (entry, peak)
+            if price > 0 and _bracket_exit(price, entry, peak, settings):
+                qty = positions.pop(sym)
+                del entries[sym]
+                cash += qty * price
+                spent += qty * price
         holdings_json = []
         for sym, pos in positions.items():
-            price = _bars_close(alpaca, sym, current_day)
+            price = float(px[matrix.column[sym]])
             value = pos * price
             holdings_json.append({"Ticker": sym, "Shares": pos, "Cost Basis": 0.0, "Current Price": price, "Total Value": value})
         port_json = json.dumps(holdings_json)
         prompt = get_portfolio_prompt(port_json, cash, "backtest", week=0) + f" Only choose from: {uni[:20]}"
         ai = ask_openai(prompt)
+        allowed = set(uni)
         buys = []
         for o in ai.orders:
             if o.side != "buy":
                 continue
-            if o.ticker not in uni:
+            if o.ticker not in allowed:
                 continue
-            price = _bars_close(alpaca, o.ticker, current_day)
+            price = float(px[matrix.column[o.ticker]])
             if price <= 0:
                 continue
             buys.append((o.ticker, price))
+        buys = buys[:target_positions]
         if buys:
             alloc = min(float(settings["budget"]["max_daily_allocation_abs"]), cash)
             per = alloc / len(buys)
-            for sym, px in buys:
-                qty = int(per // px)
+            for sym, price in buys:
+                qty = int(per // price)
                 if qty <= 0:
                     continue
-                cash -= qty * px
-                positions[sym] = positions.get(sym, 0) + qty
+                cash -= qty * price
+                spent += qty * price
+                held = positions.get(sym, 0)
+                entry, peak = entries.get(sym, (price, price))
+                entries[sym] = ((held * entry + qty * price) / (held + qty), max(peak, price))
+                positions[sym] = held + qty
         day_value = cash
         for sym, qty in positions.items():
-            day_value += qty * _bars_close(alpaca, sym, current_day)
+            day_value += qty * float(px[matrix.column[sym]])
         equity = day_value
-        equity_curve.append({"date": current_day.isoformat(), "equity": equity})
-        current_day += timedelta(days=1)
-    df = pd.DataFrame(equity_curve)
-    ret = df["equity"].pct_change().fillna(0)
-    sharpe = (ret.mean() / (ret.std() + 1e-9)) * (252 ** 0.5)
-    max_dd = 0.0
-    peak = -1e18
-    for v in df["equity"]:
-        peak = max(peak, v)
-        dd = (peak - v) / peak if peak > 0 else 0
-        max_dd = max(max_dd, dd)
-    return {"final_equity": float(df["equity"].iloc[-1]), "sharpe": float(sharpe), "max_drawdown": float(max_dd), "equity_curve": equity_curve}
+        equity_curve.append({"date": day_string(matrix.days[i]), "equity": equity})
+        traded.append(spent)
+    result = metrics.summarize([p["equity"] for p in equity_curve], traded_value=traded)
+    result["equity_curve"] = equity_curve
+    return result
@@ -0,0 +1,162 @@
+import os
+import json
+import tempfile
+import numpy as np
+
+from typing import Dict, List, Optional
+from datetime import datetime, timezone
+from alpaca_trade_api.rest import TimeFrame
+from .alpaca_service import get_bars_since
+from .workers import run_batches
+
+
+# Column layout of every per-symbol array: epoch day number followed by OHLCV.
+FIELDS = ("day", "o", "h", "l", "c", "v")
+COL = {f: i for i, f in enumerate(FIELDS)}
+
+META_FILE = "_meta.json"
+
+
+def _chunks(seq, n):
+    for i in range(0, len(seq), n):
+        yield seq[i:i+n]
+
+
+def day_number(ts) -> int:
+    return int(np.datetime64(str(ts)[:10], "D").astype(np.int64))
+
+
+def day_string(day: int) -> str:
+    return str(np.datetime64(int(day), "D"))
+
+
+def today_number() -> int:
+    return day_number(datetime.now(timezone.utc).date())
+
+
+def bars_to_rows(bars) -> Dict[str, np.ndarray]:
+    by_sym = {}
+    for b in bars:
+        by_sym.setdefault(b.S, []).append((day_number(b.t), float(b.o), float(b.h), float(b.l), float(b.c), float(b.v)))
+    return {s: np.asarray(rows, dtype=np.float64) for s, rows in by_sym.items()}
+
+
+class BarStore:
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, symbol: str) -> str:
+        return os.path.join(self.root, f"{symbol.replace('/', '_')}.npy")
+
+    def has(self, symbol: str) -> bool:
+        return os.path.exists(self._path(symbol))
+
+    def symbols(self) -> List[str]:
+        return sorted(f[:-4] for f in os.listdir(self.root) if f.endswith(".npy"))
+
+    def read(self, symbol: str, limit: Optional[int] = None) -> np.ndarray:
+        p = self._path(symbol)
+        if not os.path.exists(p):
+            return np.empty((0, len(FIELDS)), dtype=np.float64)
+        arr = np.load(p, mmap_mode="r")
+        if arr.size == 0:
+            return np.empty((0, len(FIELDS)), dtype=np.float64)
+        return arr[-limit:] if limit else arr
+
+    def last_day(self, symbol: str) -> Optional[int]:
+        arr = self.read(symbol, 1)
+        return int(arr[-1, COL["day"]]) if len(arr) else None
+
+    def write(self, symbol: str, arr: np.ndarray) -> None:
+        fd, tmp = tempfile.mkstemp(prefix=".tmp_", dir=self.root)
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, np.ascontiguousarray(arr, dtype=np.float64).reshape(-1, len(FIELDS)))
+        os.replace(tmp, self._path(symbol))
+
+    def first_day(self, symbol: str) -> Optional[int]:
+        arr = self.read(symbol)
+        return int(arr[0, COL["day"]]) if len(arr) else None
+
+    def append(self, symbol: str, rows: np.ndarray) -> int:
+        # Merges by day: sessions already stored are kept, new ones are inserted in order.
+        old = np.array(self.read(symbol))
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, len(FIELDS))
+        if len(old):
+            rows = rows[~np.isin(rows[:, COL["day"]], old[:, COL["day"]])]
+            if not len(rows):
+                return 0
+        merged = np.concatenate([old, rows]) if len(old) else rows
+        self.write(symbol, merged[np.argsort(merged[:, COL["day"]], kind="stable")])
+        return len(rows)
+
+    def _meta(self) -> dict:
+        p = os.path.join(self.root, META_FILE)
+        if not os.path.exists(p):
+            return {}
+        with open(p, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_meta(self, meta: dict) -> None:
+        with open(os.path.join(self.root, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+    def refresh(self, alpaca, symbols: List[str], days: int, batch_size: int = 200, deadline: Optional[float] = None, concurrency: int = 1, per_minute: float = 0) -> int:
+        today = today_number()
+        if self._meta().get("refreshed_on") == day_string(today):
+            symbols = [s for s in symbols if not self.has(s)]
+        lookback = today - (days * 7 // 5 + 10)
+        groups = {}
+        for s in symbols:
+            last = self.last_day(s)
+            start = lookback if last is None else last + 1
+            if start < today:
+                groups.setdefault(start, []).append(s)
+        jobs = [(start, batch) for start, syms in sorted(groups.items()) for batch in _chunks(syms, batch_size)]
+        fetched = run_batches(
+            lambda job: bars_to_rows(get_bars_since(alpaca, job[1], TimeFrame.Day, day_string(job[0]))),
+            jobs, concurrency=concurrency, per_minute=per_minute, deadline=deadline
+        )
+        written = 0
+        complete = True
+        for (start, batch), rows in zip(jobs, fetched):
+            if rows is None:
+                complete = False
+                continue
+            for s in batch:
+                # Today's bar is still forming; only completed sessions are persisted.
+                done = rows[s][rows[s][:, COL["day"]] < today] if s in rows else None
+                if done is not None and len(done):
+                    written += self.append(s, done)
+                elif not self.has(s):
+                    self.write(s, np.empty((0, len(FIELDS))))
+        if complete:
+            meta = self._meta()
+            meta["refreshed_on"] = day_string(today)
+            self._save_meta(meta)
+        return written
+
+    def backfill(self, alpaca, symbols: List[str], start_day: int, end_day: int, batch_size: int = 200, concurrency: int = 1, per_minute: float = 0) -> int:
+        # Makes sure [start_day, end_day] is stored for every symbol; the covered
+        # range is remembered so symbols listed mid-range are not re-requested.
+        end_day = min(end_day, today_number() - 1)
+        meta = self._meta()
+        covered = meta.get("covered", {})
+        need = [s for s in symbols if s not in covered or covered[s][0] > start_day or covered[s][1] < end_day]
+        jobs = list(_chunks(need, batch_size))
+        fetched = run_batches(
+            lambda batch: bars_to_rows(get_bars_since(alpaca, batch, TimeFrame.Day, day_string(start_day), day_string(end_day))),
+            jobs, concurrency=concurrency, per_minute=per_minute
+        )
+        written = 0
+        for batch, rows in zip(jobs, fetched):
+            for s in batch:
+                if s in rows:
+                    written += self.append(s, rows[s])
+                elif not self.has(s):
+                    self.write(s, np.empty((0, len(FIELDS))))
+                lo, hi = covered.get(s, (start_day, end_day))
+                covered[s] = [min(lo, start_day), max(hi, end_day)]
+        meta["covered"] = covered
+        self._save_meta(meta)
+        return written
@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import hashlib
+import numpy as np
+
+from typing import Dict, List, Tuple
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from .instrumentation import record_bytes, file_size
+
+
+# Charts are drawn on bare Agg figures (no pyplot state). They are rendered
+# serially: a handful of small figures is cheaper to draw than a process pool is
+# to start, and forking from the report's worker thread could deadlock. A
+# manifest next to the PNGs stores the hash of the series each file was drawn
+# from; unchanged series reuse the existing file.
+
+MANIFEST = ".chart_cache.json"
+
+# Manifest entries for files gone from disk or not redrawn for this long are
+# dropped, so dated chart names don't accumulate forever.
+MANIFEST_KEEP_SECONDS = 7 * 86400
+
+# Bump when a renderer's look changes so cached PNGs are redrawn.
+VERSION = 1
+
+
+def _usd(ax) -> None:
+    ax.yaxis.set_major_formatter(FuncFormatter(lambda y, _: f"${y:,.0f}"))
+
+
+def _equity(fig: Figure, x, y) -> None:
+    ax = fig.add_subplot()
+    ax.plot(x, y, marker="o")
+    ax.set_title("Portfolio Equity")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("USD")
+    _usd(ax)
+    ax.grid(True, axis="y", alpha=0.25)
+
+
+def _pnl(fig: Figure, x, y) -> None:
+    ax = fig.add_subplot()
+    ax.plot(x, y, marker="o")
+    ax.set_title("Cumulative P/L")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("USD")
+    _usd(ax)
+    ax.grid(True, axis="y", alpha=0.25)
+
+
+def _weekly(fig: Figure, x, y) -> None:
+    ax = fig.add_subplot()
+    ax.plot(x, y, marker="o", label="ChatGPT Portfolio")
+    ax.set_title("Weekly Portfolio Performance")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Total Equity ($)")
+    ax.tick_params(axis="x", labelrotation=30)
+    ax.grid(True)
+    ax.legend()
+
+
+# kind -> (draw, figsize, dpi)
+RENDERERS = {
+    "equity": (_equity, (7.5, 3.6), 160),
+    "pnl": (_pnl, (7.5, 2.6), 160),
+    "weekly": (_weekly, (10, 5), 120),
+}
+
+
+def series_hash(kind: str, x, y) -> str:
+    h = hashlib.sha256(f"{kind}:{VERSION}".encode())
+    h.update("|".join(str(v) for v in np.asarray(x)).encode())
+    h.update(np.ascontiguousarray(y, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+def draw(kind: str, x, y) -> Figure:
+    fn, figsize, _ = RENDERERS[kind]
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    fn(fig, x, y)
+    fig.tight_layout()
+    return fig
+
+
+def _render(job) -> str:
+    kind, path, x, y = job
+    fig = draw(kind, x, y)
+    fig.savefig(path, dpi=RENDERERS[kind][2])
+    return path
+
+
+def _load_manifest(plot_dir: str) -> Dict[str, str]:
+    try:
+        with open(os.path.join(plot_dir, MANIFEST), "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except Exception:
+        return {}
+
+
+def _save_manifest(plot_dir: str, manifest: Dict[str, str]) -> None:
+    p = os.path.join(plot_dir, MANIFEST)
+    tmp = p + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=1, sort_keys=True)
+    os.replace(tmp, p)
+
+
+def _prune(plot_dir: str, manifest: Dict[str, str], keep) -> Dict[str, str]:
+    cutoff = time.time() - MANIFEST_KEEP_SECONDS
+    out = {}
+    for name, digest in manifest.items():
+        path = os.path.join(plot_dir, name)
+        if name in keep or (os.path.exists(path) and os.path.getmtime(path) >= cutoff):
+            out[name] = digest
+    return out
+
+
+def render_charts(plot_dir: str, jobs: List[Tuple[str, str, object, object]]) -> Dict[str, str]:
+    # jobs are (kind, filename, x, y); returns {filename: path} for every job.
+    os.makedirs(plot_dir, exist_ok=True)
+    manifest = _load_manifest(plot_dir)
+    out, pending, digests = {}, [], {}
+    for kind, name, x, y in jobs:
+        path = os.path.join(plot_dir, name)
+        digest = series_hash(kind, x, y)
+        out[name] = path
+        if manifest.get(name) == digest and os.path.exists(path):
+            continue
+        digests[name] = digest
+        pending.append((kind, path, np.asarray(x), np.asarray(y)))
+    for job in pending:
+        _render(job)
+    if pending:
+        record_bytes("report.charts", written=sum(file_size(job[1]) for job in pending))
+    pruned = _prune(plot_dir, manifest, set(out))
+    if digests or len(pruned) != len(manifest):
+        pruned.update(digests)
+        _save_manifest(plot_dir, pruned)
+    return out
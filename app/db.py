@@ -1,68 +1,123 @@
 import os
 import sqlite3
+import threading
 
+from typing import Dict, Iterable, Optional
 from datetime import datetime, timezone
 
 
 DB_PATH = os.path.join(os.path.dirname(__file__), "trades.db")
 
+OPEN_FILTER = "status NOT IN ('closed','canceled','rejected')"
+
+INSERT_SQL = """
+INSERT INTO trades (timestamp, ticker, side, qty, limit_price, filled_qty, filled_avg_price, status, pnl)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class TradeStore:
+    # One long-lived WAL connection per process instead of a connect/close per call.
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.init()
+
+    def init(self):
+        with self._lock, self.conn:
+            self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS trades (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT,
+                ticker TEXT,
+                side TEXT,
+                qty INTEGER,
+                limit_price REAL,
+                filled_qty INTEGER,
+                filled_avg_price REAL,
+                status TEXT,
+                pnl REAL
+            )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_trades_ticker_pnl ON trades (ticker, pnl)")
+            # Partial index matching get_open_trades' filter, so it stays small as history grows.
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_trades_open_status ON trades (status) WHERE {OPEN_FILTER}")
+
+    def insert_trade(self, ticker, side, qty, limit_price, status, filled_qty=0, filled_avg_price=0.0, pnl=None):
+        self.insert_trades([{
+            "ticker": ticker,
+            "side": side,
+            "qty": qty,
+            "limit_price": limit_price,
+            "status": status,
+            "filled_qty": filled_qty,
+            "filled_avg_price": filled_avg_price,
+            "pnl": pnl
+        }])
+
+    def insert_trades(self, trades: Iterable[Dict]) -> int:
+        rows = [(
+            t.get("timestamp") or _now(),
+            t["ticker"],
+            t["side"],
+            t["qty"],
+            t["limit_price"],
+            t.get("filled_qty", 0),
+            t.get("filled_avg_price", 0.0),
+            t["status"],
+            t.get("pnl")
+        ) for t in trades]
+        if not rows:
+            return 0
+        with self._lock, self.conn:
+            self.conn.executemany(INSERT_SQL, rows)
+        return len(rows)
+
+    def update_trade_pnl(self, ticker, pnl):
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE trades SET pnl=? WHERE ticker=? AND pnl IS NULL", (pnl, ticker))
+
+    def get_open_trades(self):
+        with self._lock:
+            return self.conn.execute(f"SELECT * FROM trades WHERE {OPEN_FILTER}").fetchall()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+_store: Optional[TradeStore] = None
+
+
+def get_store() -> TradeStore:
+    global _store
+    if _store is None:
+        _store = TradeStore(DB_PATH)
+    return _store
+
 
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS trades (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        timestamp TEXT,
-        ticker TEXT,
-        side TEXT,
-        qty INTEGER,
-        limit_price REAL,
-        filled_qty INTEGER,
-        filled_avg_price REAL,
-        status TEXT,
-        pnl REAL
-    )
-    """)
-    conn.commit()
-    conn.close()
+    get_store()
 
 
 def insert_trade(ticker, side, qty, limit_price, status, filled_qty=0, filled_avg_price=0.0, pnl=None):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-    INSERT INTO trades (timestamp, ticker, side, qty, limit_price, filled_qty, filled_avg_price, status, pnl)
-    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        datetime.now(timezone.utc).isoformat(),
-        ticker,
-        side,
-        qty,
-        limit_price,
-        filled_qty,
-        filled_avg_price,
-        status,
-        pnl
-    ))
-    conn.commit()
-    conn.close()
+    get_store().insert_trade(ticker, side, qty, limit_price, status, filled_qty, filled_avg_price, pnl)
+
+
+def insert_trades(trades: Iterable[Dict]) -> int:
+    return get_store().insert_trades(trades)
 
 
 def update_trade_pnl(ticker, pnl):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-    UPDATE trades SET pnl=? WHERE ticker=? AND pnl IS NULL
-    """, (pnl, ticker))
-    conn.commit()
-    conn.close()
+    get_store().update_trade_pnl(ticker, pnl)
 
 
 def get_open_trades():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT * FROM trades WHERE status NOT IN ('closed','canceled','rejected')")
-    rows = c.fetchall()
-    conn.close()
-    return rows
+    return get_store().get_open_trades()
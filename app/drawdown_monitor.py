@@ -0,0 +1,237 @@
+import os
+import json
+import time
+import argparse
+import threading
+
+from typing import Dict, Optional, Tuple
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from .config_loader import load_settings
+from .alpaca_service import make_alpaca, make_trade_stream, get_account, get_clock, list_positions
+from .risk_controls import flatten_all
+
+
+# Long-running intraday guard. Live equity is cash plus held quantity times the
+# latest mark; a quote only moves its own symbol's term and a fill only moves
+# cash and that symbol's quantity, so every update is O(1). The stream handler
+# just compares equity to a precomputed floor and wakes the main thread, which
+# flattens everything concurrently. Without a quote stream (or with
+# ALPACA_FAKE) marks are polled from latest trades instead.
+
+
+class LiveEquity:
+    def __init__(self, cash: float, positions: Dict[str, Tuple[float, float]]):
+        self._lock = threading.Lock()
+        self.reset(cash, positions)
+
+    def reset(self, cash: float, positions: Dict[str, Tuple[float, float]]) -> None:
+        # positions: symbol -> (qty, mark)
+        with self._lock:
+            self.cash = float(cash)
+            self.qty = {s: float(q) for s, (q, _) in positions.items()}
+            self.marks = {s: float(m) for s, (_, m) in positions.items()}
+            self.equity = self.cash + sum(self.qty[s] * self.marks[s] for s in self.qty)
+
+    def mark(self, symbol: str, price: float) -> float:
+        with self._lock:
+            q = self.qty.get(symbol)
+            if q is not None and price > 0:
+                self.equity += q * (price - self.marks[symbol])
+                self.marks[symbol] = price
+            return self.equity
+
+    def fill(self, symbol: str, signed_qty: float, price: float, position_qty: Optional[float] = None) -> float:
+        with self._lock:
+            old_q, old_m = self.qty.get(symbol, 0.0), self.marks.get(symbol, price)
+            new_q = old_q + signed_qty if position_qty is None else float(position_qty)
+            self.cash -= signed_qty * price
+            self.equity += new_q * price - old_q * old_m - signed_qty * price
+            if new_q:
+                self.qty[symbol], self.marks[symbol] = new_q, price
+            else:
+                self.qty.pop(symbol, None)
+                self.marks.pop(symbol, None)
+            return self.equity
+
+    def symbols(self):
+        with self._lock:
+            return list(self.qty)
+
+
+def _quote_mid(q) -> float:
+    bid, ask = float(getattr(q, "bid_price", 0) or 0), float(getattr(q, "ask_price", 0) or 0)
+    if bid > 0 and ask > 0:
+        return (bid + ask) / 2
+    return bid or ask
+
+
+class DrawdownMonitor:
+    def __init__(self, alpaca, settings: dict, baseline: Optional[float] = None):
+        self.alpaca = alpaca
+        self.settings = settings
+        cfg = settings["drawdown"].get("monitor", {})
+        self.resync_seconds = float(cfg.get("resync_seconds", 60))
+        self.poll_seconds = float(cfg.get("poll_seconds", 2))
+        self.data_feed = cfg.get("data_feed", "iex")
+        self.limit = float(settings["drawdown"]["max_daily_loss_pct"])
+        self.baseline = baseline
+        self.live = LiveEquity(0.0, {})
+        self.breach = threading.Event()
+        self.breach_at: Optional[float] = None
+        # Set on a breach or when a fill adds a symbol; the main thread does the work.
+        self._wake = threading.Event()
+        self._stream = None
+        self._subscribed: set = set()
+
+    @property
+    def floor(self) -> float:
+        return self.baseline * (1 - self.limit)
+
+    def resync(self) -> float:
+        self._fresh("get_account", "list_positions")
+        acct = get_account(self.alpaca)
+        if self.baseline is None:
+            # Alpaca's last_equity is the previous session's closing equity.
+            self.baseline = float(getattr(acct, "last_equity", None) or acct.equity)
+        positions = {p.symbol: (float(p.qty), float(p.current_price)) for p in list_positions(self.alpaca)}
+        self.live.reset(float(acct.cash), positions)
+        self._subscribe(list(positions))
+        self._check(self.live.equity)
+        return self.live.equity
+
+    def _check(self, equity: float) -> None:
+        if self.baseline is None:
+            return
+        if self.limit > 0 and equity <= self.floor and not self.breach.is_set():
+            self.breach_at = time.perf_counter()
+            self.breach.set()
+            self._wake.set()
+
+    async def _on_quote(self, q):
+        self._check(self.live.mark(q.symbol, _quote_mid(q)))
+
+    async def _on_trade_update(self, data):
+        if getattr(data, "event", None) not in ("fill", "partial_fill"):
+            return
+        order = getattr(data, "order", None) or {}
+        symbol, qty, price = order.get("symbol"), float(getattr(data, "qty", 0) or 0), float(getattr(data, "price", 0) or 0)
+        if not symbol or qty <= 0 or price <= 0:
+            return
+        pos = getattr(data, "position_qty", None)
+        self._check(self.live.fill(symbol, qty if order.get("side") == "buy" else -qty, price, None if pos is None else float(pos)))
+        # Subscribing blocks on this stream's own loop, so leave it to run().
+        if symbol not in self._subscribed:
+            self._wake.set()
+
+    def _subscribe(self, symbols) -> None:
+        if self._stream is None:
+            return
+        new = [s for s in symbols if s not in self._subscribed]
+        if new:
+            self._stream.subscribe_quotes(self._on_quote, *new)
+            self._subscribed.update(new)
+
+    def _start_stream(self) -> bool:
+        try:
+            self._stream = make_trade_stream(self.data_feed)
+            self._stream.subscribe_trade_updates(self._on_trade_update)
+            threading.Thread(target=self._stream.run, name="drawdown-quotes", daemon=True).start()
+            return True
+        except Exception as e:
+            print("Quote stream unavailable, polling latest trades instead:", repr(e))
+            self._stream = None
+            return False
+
+    def _fresh(self, *names: str) -> None:
+        # Skip the API cache for reads the monitor acts on.
+        if hasattr(self.alpaca, "invalidate"):
+            self.alpaca.invalidate(*names)
+
+    def _poll_marks(self) -> None:
+        syms = self.live.symbols()
+        if not syms:
+            return
+        self._fresh("get_latest_trades")
+        for s, t in self.alpaca.get_latest_trades(syms).items():
+            self._check(self.live.mark(s, float(t.price)))
+
+    def run(self, until: Optional[datetime] = None) -> dict:
+        # Watches until the breach (then flattens and returns) or until `until`.
+        # Baseline and positions first, so stream handlers never see an unset floor;
+        # fills landing between the two are picked up by the next resync.
+        self.resync()
+        streaming = self._start_stream()
+        self._subscribe(self.live.symbols())
+        print(f"Monitoring {len(self.live.symbols())} position(s): equity ${self.live.equity:,.2f}, floor ${self.floor:,.2f} ({'stream' if streaming else 'polling'})")
+        next_sync = time.monotonic() + self.resync_seconds
+        try:
+            while until is None or datetime.now(timezone.utc) < until:
+                woken = self._wake.wait(self.resync_seconds if streaming else self.poll_seconds)
+                self._wake.clear()
+                if self.breach.is_set():
+                    return self._flatten()
+                try:
+                    if woken:
+                        self._subscribe(self.live.symbols())
+                    if not streaming:
+                        self._poll_marks()
+                    if time.monotonic() >= next_sync:
+                        self.resync()
+                        next_sync = time.monotonic() + self.resync_seconds
+                except Exception as e:
+                    print("Drawdown monitor refresh failed:", repr(e))
+                if self.breach.is_set():
+                    return self._flatten()
+            return {"breached": False, "equity": self.live.equity, "baseline": self.baseline}
+        finally:
+            self.stop()
+
+    def _flatten(self) -> dict:
+        equity = self.live.equity
+        # The quote stream is stopped afterwards, in run(); flattening comes first.
+        self._fresh("list_positions")
+        if not self.settings["drawdown"].get("flatten_on_breach", True):
+            print(f"Daily loss limit hit: equity ${equity:,.2f} <= ${self.floor:,.2f}; flatten_on_breach is off")
+            return {"breached": True, "equity": equity, "baseline": self.baseline, "floor": self.floor, "flatten": None}
+        # reaction_ms is breach to flatten start; the flatten report times each leg.
+        reaction = time.perf_counter() - self.breach_at
+        flat = flatten_all(self.alpaca, self.settings)
+        print(f"Daily loss limit hit: equity ${equity:,.2f} <= ${self.floor:,.2f}; flatten started after {reaction * 1000:.1f} ms, took {flat['seconds']:.2f}s via {flat['method']}")
+        return {"breached": True, "equity": equity, "baseline": self.baseline, "floor": self.floor, "reaction_ms": round(reaction * 1000, 1), "flatten": flat}
+
+    def stop(self, timeout: float = 5.0) -> None:
+        # Stream.stop() waits on the stream's loop; never let it hang the monitor.
+        stream, self._stream = self._stream, None
+        if stream is not None:
+            t = threading.Thread(target=self._stop_stream, args=(stream,), name="drawdown-stop", daemon=True)
+            t.start()
+            t.join(timeout)
+
+    @staticmethod
+    def _stop_stream(stream) -> None:
+        try:
+            stream.stop()
+        except Exception:
+            pass
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Watch live equity and flatten on the daily loss limit")
+    ap.add_argument("--baseline", type=float, help="start-of-day equity; defaults to the account's last_equity")
+    ap.add_argument("--all-day", action="store_true", help="keep running past the session close")
+    args = ap.parse_args()
+    load_dotenv()
+    settings = load_settings(os.path.join(os.path.dirname(__file__), "config", "settings.json"))
+    alpaca = make_alpaca(settings.get("api_cache"))
+    until = None
+    if not args.all_day:
+        # Runs through the current session, or the next one when started while closed.
+        until = get_clock(alpaca).next_close
+        until = until.to_pydatetime() if hasattr(until, "to_pydatetime") else datetime.fromisoformat(str(until))
+    result = DrawdownMonitor(alpaca, settings, baseline=args.baseline).run(until=until)
+    print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+
+from typing import Dict, Optional, Tuple
+
+
+# TOTAL rows of the portfolio CSV mirrored into a small SQLite table next to it.
+# The CSV stays the source of truth: the table records the CSV size it was last
+# synced at and is rebuilt whenever the CSV changed behind its back.
+
+_cache: Dict[str, Tuple[int, "EquityHistory"]] = {}
+
+
+def _db_path(portfolio_csv: str) -> str:
+    return os.path.splitext(portfolio_csv)[0] + "_equity.sqlite"
+
+
+def _csv_size(portfolio_csv: str) -> int:
+    return os.path.getsize(portfolio_csv) if os.path.exists(portfolio_csv) else 0
+
+
+def _connect(portfolio_csv: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(_db_path(portfolio_csv))
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS equity (
+        seq INTEGER PRIMARY KEY,
+        timestamp TEXT,
+        date TEXT,
+        equity REAL,
+        cash REAL
+    )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_equity_timestamp ON equity (timestamp)")
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    return conn
+
+
+def _synced_size(conn: sqlite3.Connection) -> Optional[int]:
+    row = conn.execute("SELECT value FROM meta WHERE key='csv_size'").fetchone()
+    return int(row[0]) if row else None
+
+
+def _set_synced_size(conn: sqlite3.Connection, size: int) -> None:
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('csv_size', ?)", (str(size),))
+
+
+def _num(v) -> Optional[float]:
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return None
+    return None if np.isnan(f) else f
+
+
+def _text(v) -> str:
+    return "" if v is None or (isinstance(v, float) and np.isnan(v)) else str(v)
+
+
+def _rebuild(conn: sqlite3.Connection, portfolio_csv: str) -> None:
+    rows = []
+    if _csv_size(portfolio_csv) > 0:
+        df = pd.read_csv(portfolio_csv)
+        if "Ticker" in df.columns:
+            df = df[df["Ticker"] == "TOTAL"]
+            col = lambda c: df[c].tolist() if c in df.columns else [None] * len(df)
+            rows = [
+                (_text(ts), _text(d), _num(eq), _num(cash))
+                for ts, d, eq, cash in zip(col("Timestamp"), col("Date"), col("Total Equity"), col("Cash Balance"))
+            ]
+    with conn:
+        conn.execute("DELETE FROM equity")
+        conn.executemany("INSERT INTO equity (timestamp, date, equity, cash) VALUES (?, ?, ?, ?)", rows)
+        _set_synced_size(conn, _csv_size(portfolio_csv))
+
+
+def record_total(portfolio_csv: str, row: dict, csv_size_before: int) -> None:
+    # Called right after a TOTAL row was appended to the CSV.
+    conn = _connect(portfolio_csv)
+    try:
+        if _synced_size(conn) != csv_size_before:
+            _rebuild(conn, portfolio_csv)
+        else:
+            with conn:
+                conn.execute(
+                    "INSERT INTO equity (timestamp, date, equity, cash) VALUES (?, ?, ?, ?)",
+                    (_text(row.get("Timestamp")), _text(row.get("Date")), _num(row.get("Total Equity")), _num(row.get("Cash Balance")))
+                )
+                _set_synced_size(conn, _csv_size(portfolio_csv))
+    finally:
+        conn.close()
+    _cache.pop(os.path.abspath(portfolio_csv), None)
+
+
+class EquityHistory:
+    # Immutable, date-sorted view of the TOTAL rows (ties keep file order).
+    def __init__(self, timestamps: np.ndarray, dates: np.ndarray, equity: np.ndarray, cash: np.ndarray):
+        self.timestamps = timestamps
+        self.dates = dates
+        self.equity = equity
+        self.cash = cash
+        self._frame = None
+
+    def __len__(self) -> int:
+        return len(self.equity)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.equity) == 0
+
+    def first(self) -> float:
+        return float(self.equity[0]) if len(self.equity) else 0.0
+
+    def latest(self) -> float:
+        return float(self.equity[-1]) if len(self.equity) else 0.0
+
+    def between(self, start_date: str, end_date: str) -> "EquityHistory":
+        lo = int(np.searchsorted(self.dates, start_date, side="left"))
+        hi = int(np.searchsorted(self.dates, end_date, side="right"))
+        return EquityHistory(self.timestamps[lo:hi], self.dates[lo:hi], self.equity[lo:hi], self.cash[lo:hi])
+
+    def frame(self) -> pd.DataFrame:
+        if self._frame is None:
+            self._frame = pd.DataFrame({
+                "Timestamp": pd.to_datetime(pd.Series(self.timestamps, dtype=object), utc=True, errors="coerce"),
+                "Date": pd.to_datetime(pd.Series(self.dates, dtype=object), errors="coerce"),
+                "Total Equity": self.equity,
+                "Cash Balance": self.cash,
+            })
+        return self._frame
+
+
+def load_equity_history(portfolio_csv: str) -> EquityHistory:
+    key = os.path.abspath(portfolio_csv)
+    size = _csv_size(portfolio_csv)
+    hit = _cache.get(key)
+    if hit is not None and hit[0] == size:
+        return hit[1]
+    conn = _connect(portfolio_csv)
+    try:
+        if _synced_size(conn) != size:
+            _rebuild(conn, portfolio_csv)
+        rows = conn.execute("SELECT timestamp, date, equity, cash FROM equity WHERE equity IS NOT NULL ORDER BY date, seq").fetchall()
+    finally:
+        conn.close()
+    hist = EquityHistory(
+        np.array([r[0] for r in rows], dtype=object),
+        np.array([r[1] for r in rows], dtype=object),
+        np.array([r[2] for r in rows], dtype=np.float64),
+        np.array([np.nan if r[3] is None else r[3] for r in rows], dtype=np.float64),
+    )
+    _cache[key] = (size, hist)
+    return hist
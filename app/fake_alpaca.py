@@ -0,0 +1,338 @@
+import time
+import uuid
+import random
+import threading
+import numpy as np
+
+from typing import Dict, List, Optional
+from datetime import date, datetime, timedelta, timezone
+from alpaca_trade_api.entity import Account, Asset, Clock, Order, Position
+from alpaca_trade_api.entity_v2 import BarsV2, TradeV2, NewsListV2
+from .bar_store import BarStore, COL, day_string
+
+
+# Offline stand-in for the REST methods the bot uses. Market data is either
+# synthetic (seeded random walks) or read from a BarStore; the account is a
+# simple in-memory ledger where marketable orders fill at the last close.
+# Responses use the real alpaca_trade_api entity types. With the same seed and
+# end date every run sees identical data.
+
+EXCHANGES = ("NASDAQ", "NYSE", "AMEX", "ARCA", "OTC")
+
+
+def _sessions(end: date, count: int) -> List[str]:
+    days, d = [], end
+    while len(days) < count:
+        if d.weekday() < 5:
+            days.append(d.isoformat())
+        d -= timedelta(days=1)
+    return days[::-1]
+
+
+def _day(ts) -> str:
+    return str(ts)[:10]
+
+
+class FakeREST:
+    def __init__(self, bars: Dict[str, np.ndarray], seed: int = 0, cash: float = 1000.0, latency: Optional[Dict[str, float]] = None, jitter: float = 0.0, market_open: bool = True):
+        # bars: symbol -> (n x 6) array in BarStore layout (day, o, h, l, c, v).
+        self._bars = {s: a for s, a in bars.items() if len(a)}
+        self._symbols = sorted(self._bars)
+        self._index = {s: i for i, s in enumerate(self._symbols)}
+        self._seed = seed
+        self._latency = dict(latency or {})
+        self._jitter = float(jitter)
+        self._rnd = random.Random(seed)
+        self._market_open = market_open
+        self._lock = threading.Lock()
+        self._cash = float(cash)
+        self._positions: Dict[str, Dict[str, float]] = {}
+        self._orders: Dict[str, dict] = {}
+        self.calls: Dict[str, int] = {}
+
+    @classmethod
+    def synthetic(cls, symbols: int = 500, days: int = 300, seed: int = 0, end: Optional[date] = None, **kwargs) -> "FakeREST":
+        sessions = _sessions(end or datetime.now(timezone.utc).date() - timedelta(days=1), days)
+        day_nums = np.array([np.datetime64(d, "D").astype(np.int64) for d in sessions], dtype=np.float64)
+        bars = {}
+        for i in range(symbols):
+            rng = np.random.default_rng([seed, i])
+            start = rng.uniform(0.5, 60.0)
+            close = start * np.exp(np.cumsum(rng.normal(0.0, rng.uniform(0.01, 0.05), len(sessions))))
+            open_ = close * np.exp(rng.normal(0.0, 0.01, len(sessions)))
+            spread = np.abs(rng.normal(0.0, 0.015, len(sessions)))
+            high = np.maximum(open_, close) * (1 + spread)
+            low = np.minimum(open_, close) * (1 - spread)
+            volume = np.floor(rng.lognormal(np.log(rng.uniform(2e4, 2e6)), 0.5, len(sessions)))
+            bars[f"S{i:04d}"] = np.column_stack([day_nums, open_, high, low, close, volume])
+        return cls(bars, seed=seed, **kwargs)
+
+    @classmethod
+    def from_bar_store(cls, root: str, seed: int = 0, **kwargs) -> "FakeREST":
+        store = BarStore(root)
+        return cls({s: np.array(store.read(s)) for s in store.symbols()}, seed=seed, **kwargs)
+
+    def _call(self, name: str) -> None:
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            delay = float(self._latency.get(name, self._latency.get("default", 0.0)))
+            if delay and self._jitter:
+                delay *= 1 + self._jitter * (2 * self._rnd.random() - 1)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _price(self, symbol: str) -> float:
+        a = self._bars.get(symbol)
+        if a is None:
+            raise ValueError(f"unknown symbol {symbol}")
+        return float(a[-1, COL["c"]])
+
+    def _prev_close(self, symbol: str) -> float:
+        a = self._bars[symbol]
+        return float(a[-2, COL["c"]]) if len(a) > 1 else float(a[-1, COL["c"]])
+
+    # --- market data ---
+
+    def _asset(self, symbol: str) -> Asset:
+        i = self._index.get(symbol, 0)
+        return Asset({
+            "id": str(uuid.UUID(int=i + 1)),
+            "class": "us_equity",
+            "symbol": symbol,
+            "name": f"{symbol} Corp",
+            "exchange": EXCHANGES[i % len(EXCHANGES)],
+            "status": "active",
+            "tradable": i % 17 != 0,
+            "marginable": False,
+            "shortable": False,
+            "easy_to_borrow": False,
+            "fractionable": False,
+        })
+
+    def list_assets(self, status=None, asset_class=None):
+        self._call("list_assets")
+        return [self._asset(s) for s in self._symbols]
+
+    def get_asset(self, symbol: str):
+        self._call("get_asset")
+        if symbol not in self._bars:
+            raise ValueError(f"asset not found for {symbol}")
+        return self._asset(symbol)
+
+    def get_bars(self, symbol, timeframe=None, start=None, end=None, limit=None, **kwargs):
+        # Daily bars only. Like the real multi-symbol endpoint, limit caps the
+        # total number of bars returned, not the count per symbol.
+        self._call("get_bars")
+        symbols = [symbol] if isinstance(symbol, str) else list(symbol)
+        lo = np.datetime64(_day(start), "D").astype(np.int64) if start else None
+        hi = np.datetime64(_day(end), "D").astype(np.int64) if end else None
+        raw = []
+        for s in sorted(set(symbols)):
+            a = self._bars.get(s)
+            if a is None:
+                continue
+            if lo is not None:
+                a = a[a[:, COL["day"]] >= lo]
+            if hi is not None:
+                a = a[a[:, COL["day"]] <= hi]
+            if limit and len(symbols) == 1:
+                a = a[-int(limit):]
+            for r in a:
+                raw.append({
+                    "S": s,
+                    "t": f"{day_string(int(r[COL['day']]))}T04:00:00Z",
+                    "o": float(r[COL["o"]]),
+                    "h": float(r[COL["h"]]),
+                    "l": float(r[COL["l"]]),
+                    "c": float(r[COL["c"]]),
+                    "v": int(r[COL["v"]]),
+                })
+        if limit:
+            raw = raw[:int(limit)]
+        return BarsV2(raw)
+
+    def _trade(self, symbol: str) -> TradeV2:
+        a = self._bars[symbol]
+        return TradeV2({"S": symbol, "p": float(a[-1, COL["c"]]), "s": 100, "x": "V", "t": f"{day_string(int(a[-1, COL['day']]))}T19:59:59Z"})
+
+    def get_latest_trade(self, symbol: str):
+        self._call("get_latest_trade")
+        if symbol not in self._bars:
+            raise ValueError(f"no trades for {symbol}")
+        return self._trade(symbol)
+
+    def get_latest_trades(self, symbols):
+        self._call("get_latest_trades")
+        return {s: self._trade(s) for s in symbols if s in self._bars}
+
+    def get_news(self, symbol=None, start=None, end=None, limit=10, **kwargs):
+        self._call("get_news")
+        syms = [symbol] if isinstance(symbol, str) else list(symbol or [])
+        out = []
+        for s in syms:
+            rnd = random.Random(f"{self._seed}:{s}")
+            for k in range(min(int(limit or 10), 3)):
+                out.append({
+                    "id": rnd.randint(1, 10 ** 9),
+                    "headline": f"{s} {rnd.choice(['beats', 'misses', 'reaffirms', 'updates'])} {rnd.choice(['guidance', 'estimates', 'outlook'])}",
+                    "source": "fake",
+                    "url": f"https://example.invalid/{s.lower()}/{k}",
+                    "symbols": [s],
+                    "created_at": f"{day_string(int(self._bars[s][-1, COL['day']]))}T1{k}:00:00Z" if s in self._bars else "",
+                })
+        return NewsListV2(out)
+
+    # --- account ---
+
+    def _market_value(self) -> float:
+        return sum(p["qty"] * self._price(s) for s, p in self._positions.items())
+
+    def get_account(self):
+        self._call("get_account")
+        with self._lock:
+            equity = self._cash + self._market_value()
+            last = self._cash + sum(p["qty"] * self._prev_close(s) for s, p in self._positions.items())
+            return Account({
+                "id": "fake-account",
+                "status": "ACTIVE",
+                "currency": "USD",
+                "cash": f"{self._cash:.2f}",
+                "equity": f"{equity:.2f}",
+                "last_equity": f"{last:.2f}",
+                "portfolio_value": f"{equity:.2f}",
+                "buying_power": f"{max(self._cash, 0.0):.2f}",
+            })
+
+    def list_positions(self):
+        self._call("list_positions")
+        out = []
+        with self._lock:
+            for s, p in sorted(self._positions.items()):
+                price, prev = self._price(s), self._prev_close(s)
+                qty, avg = p["qty"], p["avg"]
+                out.append(Position({
+                    "symbol": s,
+                    "qty": str(int(qty)),
+                    "side": "long",
+                    "avg_entry_price": f"{avg:.4f}",
+                    "current_price": f"{price:.4f}",
+                    "lastday_price": f"{prev:.4f}",
+                    "market_value": f"{qty * price:.2f}",
+                    "cost_basis": f"{qty * avg:.2f}",
+                    "unrealized_pl": f"{qty * (price - avg):.2f}",
+                    "unrealized_plpc": f"{(price / avg - 1) if avg else 0.0:.6f}",
+                    "unrealized_intraday_pl": f"{qty * (price - prev):.2f}",
+                    "unrealized_intraday_plpc": f"{(price / prev - 1) if prev else 0.0:.6f}",
+                }))
+        return out
+
+    def get_clock(self):
+        self._call("get_clock")
+        now = datetime.now(timezone.utc)
+        return Clock({
+            "timestamp": now.isoformat(),
+            "is_open": self._market_open,
+            "next_open": (now + timedelta(hours=16)).isoformat(),
+            "next_close": (now + timedelta(hours=6)).isoformat(),
+        })
+
+    # --- orders ---
+
+    def _fill(self, o: dict) -> None:
+        symbol, qty, side = o["symbol"], int(o["qty"]), o["side"]
+        price = self._price(symbol)
+        limit = o.get("limit_price")
+        if limit is not None and ((side == "buy" and float(limit) < price) or (side == "sell" and float(limit) > price)):
+            return
+        pos = self._positions.get(symbol, {"qty": 0.0, "avg": 0.0})
+        if side == "buy":
+            if qty * price > self._cash:
+                o["status"] = "rejected"
+                return
+            total = pos["qty"] + qty
+            pos["avg"] = (pos["qty"] * pos["avg"] + qty * price) / total
+            pos["qty"] = total
+            self._cash -= qty * price
+        else:
+            qty = min(qty, int(pos["qty"]))
+            if qty <= 0:
+                o["status"] = "rejected"
+                return
+            pos["qty"] -= qty
+            self._cash += qty * price
+        if pos["qty"] > 0:
+            self._positions[symbol] = pos
+        else:
+            self._positions.pop(symbol, None)
+        now = datetime.now(timezone.utc).isoformat()
+        o.update(status="filled", filled_qty=str(qty), filled_avg_price=f"{price:.4f}", filled_at=now, updated_at=now)
+
+    def submit_order(self, symbol, qty, side, type="market", time_in_force="day", limit_price=None, client_order_id=None, **kwargs):
+        self._call("submit_order")
+        if symbol not in self._bars:
+            raise ValueError(f"asset {symbol} not found")
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            oid = str(uuid.UUID(int=self._rnd.getrandbits(128)))
+        o = {
+            "id": oid,
+            "client_order_id": client_order_id or oid,
+            "symbol": symbol,
+            "qty": str(int(qty)),
+            "side": side,
+            "type": type,
+            "time_in_force": time_in_force,
+            "limit_price": None if limit_price is None else str(limit_price),
+            "order_class": kwargs.get("order_class", ""),
+            "status": "new",
+            "filled_qty": "0",
+            "filled_avg_price": None,
+            "submitted_at": now,
+            "created_at": now,
+            "updated_at": now,
+        }
+        with self._lock:
+            if self._market_open:
+                self._fill(o)
+            self._orders[o["id"]] = o
+            return Order(dict(o))
+
+    def get_order(self, order_id: str):
+        self._call("get_order")
+        with self._lock:
+            return Order(dict(self._orders[order_id]))
+
+    def list_orders(self, status="open", limit=50, after=None, until=None, direction="desc", nested=None, symbols=None, **kwargs):
+        self._call("list_orders")
+        terminal = {"filled", "canceled", "rejected", "expired"}
+        with self._lock:
+            rows = list(self._orders.values())
+        if status == "open":
+            rows = [o for o in rows if o["status"] not in terminal]
+        elif status == "closed":
+            rows = [o for o in rows if o["status"] in terminal]
+        if after:
+            rows = [o for o in rows if o["submitted_at"] > str(after)]
+        if symbols:
+            rows = [o for o in rows if o["symbol"] in set(symbols)]
+        rows.sort(key=lambda o: o["submitted_at"], reverse=direction == "desc")
+        return [Order(dict(o)) for o in rows[:int(limit or 50)]]
+
+    def cancel_all_orders(self):
+        self._call("cancel_all_orders")
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            for o in self._orders.values():
+                if o["status"] not in {"filled", "canceled", "rejected", "expired"}:
+                    o.update(status="canceled", canceled_at=now, updated_at=now)
+
+    def close_all_positions(self):
+        # Same shape as the real DELETE /positions: one {symbol, status, body} per position.
+        self._call("close_all_positions")
+        with self._lock:
+            held = [(s, int(p["qty"])) for s, p in sorted(self._positions.items())]
+        out = []
+        for s, qty in held:
+            o = self.submit_order(symbol=s, qty=qty, side="sell", type="market", time_in_force="day")
+            out.append(Position({"symbol": s, "status": 200, "body": o._raw}))
+        return out
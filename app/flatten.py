@@ -0,0 +1,165 @@
+import time
+
+from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from alpaca_trade_api.entity import Order
+from .alpaca_service import list_positions, submit_order, cancel_all_orders, close_all_positions
+from .order_tracker import OrderTracker
+
+
+# Liquidates the book as fast as the API allows. Open orders are cancelled
+# first (bracket legs would otherwise hold the shares), then one DELETE
+# /positions closes everything; if that endpoint is unavailable every position
+# gets its own market order, all submitted at once. Orders are tracked to a
+# terminal state together, and legs that come back rejected, cancelled or
+# unsent are retried against freshly read positions.
+
+FAILED = {"rejected", "canceled", "expired"}
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
+
+
+def _qty(v) -> float:
+    q = abs(float(v or 0))
+    return int(q) if q.is_integer() else q
+
+
+def _leg(symbol: str, qty: float, side: str, attempt: int) -> dict:
+    return {"symbol": symbol, "qty": qty, "side": side, "attempt": attempt, "order_id": None, "status": None,
+            "filled_qty": 0.0, "filled_avg_price": None, "submit_ms": None, "settle_ms": None, "error": None}
+
+
+def _position_legs(positions, attempt: int) -> List[dict]:
+    legs = []
+    for p in positions:
+        if _qty(p.qty) > 0:
+            legs.append(_leg(p.symbol, _qty(p.qty), "sell" if float(p.qty) > 0 else "buy", attempt))
+    return legs
+
+
+def _submit(alpaca, leg: dict) -> dict:
+    t = time.monotonic()
+    try:
+        o = submit_order(alpaca, symbol=leg["symbol"], qty=leg["qty"], side=leg["side"], type="market", time_in_force="day")
+        leg.update(order=o, order_id=o.id, status=o.status)
+    except Exception as e:
+        leg["error"] = str(e)
+    leg["_sent"] = time.monotonic()
+    leg["submit_ms"] = _ms(leg["_sent"] - t)
+    return leg
+
+
+def _submit_all(alpaca, legs: List[dict]) -> List[dict]:
+    if not legs:
+        return []
+    with ThreadPoolExecutor(max_workers=min(len(legs), 16)) as ex:
+        return list(ex.map(lambda leg: _submit(alpaca, leg), legs))
+
+
+def _close_all(alpaca) -> List[dict]:
+    t = time.monotonic()
+    rows = close_all_positions(alpaca)
+    sent = time.monotonic()
+    legs = []
+    for r in rows:
+        body = getattr(r, "body", None) or {}
+        leg = _leg(getattr(r, "symbol", body.get("symbol")), _qty(body.get("qty")), body.get("side", "sell"), 0)
+        leg.update(_sent=sent, submit_ms=_ms(sent - t))
+        if int(getattr(r, "status", 200)) == 200 and body.get("id"):
+            o = Order(body)
+            leg.update(order=o, order_id=o.id, status=o.status)
+        else:
+            leg["error"] = body.get("message") or f"HTTP {getattr(r, 'status', '?')}"
+        legs.append(leg)
+    return legs
+
+
+def _settle(tracker: OrderTracker, legs: List[dict]) -> None:
+    ids = [leg["order_id"] for leg in legs if leg.get("order") is not None]
+    tracker.track(leg["order"] for leg in legs if leg.get("order") is not None)
+    final = tracker.wait(stop=False)
+    tracker.untrack(ids)
+    for leg in legs:
+        o = final.get(leg["order_id"]) if leg["order_id"] else None
+        if o is None:
+            continue
+        leg["status"] = o.status
+        leg["filled_qty"] = float(getattr(o, "filled_qty", 0) or 0)
+        price = getattr(o, "filled_avg_price", None)
+        leg["filled_avg_price"] = float(price) if price else None
+        if leg["order_id"] in tracker.settled_at:
+            leg["settle_ms"] = _ms(tracker.settled_at[leg["order_id"]] - leg["_sent"])
+
+
+def _fresh_positions(alpaca) -> None:
+    if hasattr(alpaca, "invalidate"):
+        alpaca.invalidate("list_positions")
+
+
+def _needs_retry(leg: dict) -> bool:
+    return leg["error"] is not None or leg["status"] in FAILED
+
+
+def flatten(alpaca, settings: dict, positions=None) -> Dict:
+    cfg = settings.get("flatten", {})
+    timeout = float(cfg.get("fill_timeout_seconds", 20))
+    stream = bool(cfg.get("stream_updates", True))
+    # Market fills often land before the socket has subscribed, so start polling almost at once.
+    stream_share = float(cfg.get("stream_share", 0.05))
+    started = time.monotonic()
+
+    # Start listening before anything is sent so immediate fills are not missed;
+    # the same tracker serves every retry round.
+    tracker = OrderTracker(alpaca, timeout=timeout, stream=stream, stream_share=stream_share).start()
+    try:
+        return _flatten(alpaca, cfg, tracker, positions, started)
+    finally:
+        tracker.stop()
+
+
+def _flatten(alpaca, cfg: dict, tracker: OrderTracker, positions, started: float) -> Dict:
+    retries = int(cfg.get("max_retries", 2))
+    delay = float(cfg.get("retry_delay_seconds", 0.5))
+    if cfg.get("cancel_open_orders", True):
+        try:
+            cancel_all_orders(alpaca)
+        except Exception as e:
+            print("Cancelling open orders before flatten failed:", repr(e))
+
+    method = "orders"
+    legs = None
+    if positions is None and cfg.get("use_close_all", True):
+        try:
+            legs = _close_all(alpaca)
+            method = "close_all"
+        except Exception as e:
+            print("Close-all endpoint unavailable, sending one order per position:", repr(e))
+    if legs is None:
+        legs = _submit_all(alpaca, _position_legs(list_positions(alpaca) if positions is None else positions, 0))
+    _settle(tracker, legs)
+
+    report = list(legs)
+    for attempt in range(1, retries + 1):
+        failed = {leg["symbol"] for leg in legs if _needs_retry(leg)}
+        if not failed:
+            break
+        time.sleep(delay * attempt)
+        _fresh_positions(alpaca)
+        legs = _submit_all(alpaca, _position_legs([p for p in list_positions(alpaca) if p.symbol in failed], attempt))
+        _settle(tracker, legs)
+        report.extend(legs)
+
+    for leg in report:
+        leg.pop("order", None)
+        leg.pop("_sent", None)
+    seconds = time.monotonic() - started
+    targets = {leg["symbol"] for leg in report}
+    try:
+        _fresh_positions(alpaca)
+        remaining = sorted(p.symbol for p in list_positions(alpaca) if p.symbol in targets and float(p.qty))
+    except Exception as e:
+        print("Could not confirm positions after flatten:", repr(e))
+        remaining = sorted({leg["symbol"] for leg in report if leg["status"] != "filled"})
+    return {"method": method, "seconds": round(seconds, 3), "flat": not remaining, "remaining": remaining, "legs": report}
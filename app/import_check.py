@@ -0,0 +1,48 @@
+import os
+import re
+import sys
+import argparse
+import subprocess
+
+
+# Guards the lazy imports in main_trading_bot: importing it must not pull in
+# the heavy libraries, and must stay under a time budget (about 90 ms today).
+# Run `python -m app.import_check`; exits non-zero on a regression.
+
+MODULE = "app.main_trading_bot"
+HEAVY = ("pandas", "numpy", "matplotlib", "openai", "alpaca_trade_api")
+BUDGET_MS = 250.0
+
+
+def measure(module: str = MODULE):
+    # Fresh interpreter so nothing is already cached in sys.modules.
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    p = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=root, capture_output=True, text=True, check=True)
+    loaded = [m for m in p.stdout.strip().split(",") if m]
+    m = re.search(rf"^import time:\s*\d+\s*\|\s*(\d+)\s*\|\s*{re.escape(module)}\s*$", p.stderr, re.M)
+    return loaded, int(m.group(1)) / 1000.0 if m else None
+
+
+def check(budget_ms: float = BUDGET_MS) -> float:
+    loaded, ms = measure()
+    assert not loaded, f"{MODULE} imports {', '.join(loaded)} at import time"
+    assert ms is not None, f"no -X importtime entry for {MODULE}"
+    assert ms <= budget_ms, f"{MODULE} takes {ms:.0f} ms to import (budget {budget_ms:.0f} ms)"
+    return ms
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Check that importing the bot stays light")
+    ap.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    args = ap.parse_args()
+    try:
+        ms = check(args.budget_ms)
+    except AssertionError as e:
+        print("FAIL:", e)
+        sys.exit(1)
+    print(f"OK: {MODULE} imports in {ms:.0f} ms (budget {args.budget_ms:.0f} ms), none of {', '.join(HEAVY)} loaded")
+
+
+if __name__ == "__main__":
+    main()
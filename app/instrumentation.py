@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import bisect
+import threading
+
+from contextlib import contextmanager
+from functools import wraps
+from datetime import datetime, timezone
+from collections import defaultdict
+from typing import Dict, Optional
+
+
+# Process-wide counters for one bot run: call counts and latency histograms per
+# operation, bytes moved, and LLM token usage. Operation names are dotted, the
+# first part being the group ("alpaca.get_account", "openai.gpt-4o", ...).
+
+RUN_METRICS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "run_metrics.jsonl")
+
+# Upper bucket edges in milliseconds; the last bucket is open-ended.
+BUCKETS_MS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_lock = threading.Lock()
+_calls: Dict[str, dict] = {}
+_bytes = defaultdict(lambda: {"read": 0, "written": 0})
+_tokens = defaultdict(lambda: {"calls": 0, "prompt": 0, "completion": 0})
+# Groups with a measured span open on the current thread, innermost last.
+_active = threading.local()
+
+
+def _new_call() -> dict:
+    return {"count": 0, "errors": 0, "seconds": 0.0, "outer_seconds": 0.0, "max_seconds": 0.0, "hist": [0] * (len(BUCKETS_MS) + 1)}
+
+
+def record_call(name: str, seconds: float, error: bool = False, nested: bool = False) -> None:
+    # nested: the span ran inside another span of the same group (e.g.
+    # storage.compact_csv inside storage.append_csv_row), so its time is
+    # already part of the outer one and is left out of outer_seconds.
+    with _lock:
+        c = _calls.get(name)
+        if c is None:
+            c = _calls[name] = _new_call()
+        c["count"] += 1
+        c["errors"] += int(error)
+        c["seconds"] += seconds
+        if not nested:
+            c["outer_seconds"] += seconds
+        c["max_seconds"] = max(c["max_seconds"], seconds)
+        c["hist"][bisect.bisect_left(BUCKETS_MS, seconds * 1000.0)] += 1
+
+
+def record_bytes(name: str, read: int = 0, written: int = 0) -> None:
+    with _lock:
+        _bytes[name]["read"] += int(read)
+        _bytes[name]["written"] += int(written)
+
+
+def record_tokens(model: str, usage) -> None:
+    if usage is None:
+        return
+    with _lock:
+        t = _tokens[model]
+        t["calls"] += 1
+        t["prompt"] += int(getattr(usage, "prompt_tokens", 0) or 0)
+        t["completion"] += int(getattr(usage, "completion_tokens", 0) or 0)
+
+
+@contextmanager
+def measure(name: str):
+    group = name.split(".", 1)[0]
+    stack = getattr(_active, "groups", None)
+    if stack is None:
+        stack = _active.groups = []
+    nested = group in stack
+    stack.append(group)
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        stack.pop()
+        record_call(name, time.perf_counter() - start, error, nested)
+
+
+def timed(name: str):
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with measure(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+class InstrumentedClient:
+    # Times every method call on the wrapped client as "<group>.<method>".
+    def __init__(self, client, group: str):
+        self._client = client
+        self._group = group
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+        label = f"{self._group}.{name}"
+
+        def call(*args, **kwargs):
+            with measure(label):
+                return attr(*args, **kwargs)
+        return call
+
+
+def instrument_session(session, group: str) -> None:
+    # requests.Session response hook: count response bodies and request payloads.
+    def hook(resp, *args, **kwargs):
+        body = resp.request.body if resp.request is not None else None
+        record_bytes(group, read=len(resp.content or b""), written=len(body) if body else 0)
+        return resp
+    session.hooks.setdefault("response", []).append(hook)
+
+
+def reset() -> None:
+    with _lock:
+        _calls.clear()
+        _bytes.clear()
+        _tokens.clear()
+
+
+def snapshot() -> dict:
+    with _lock:
+        return {
+            "calls": {k: dict(v, hist=list(v["hist"]), seconds=round(v["seconds"], 4), outer_seconds=round(v["outer_seconds"], 4), max_seconds=round(v["max_seconds"], 4)) for k, v in sorted(_calls.items())},
+            "bytes": {k: dict(v) for k, v in sorted(_bytes.items())},
+            "tokens": {k: dict(v) for k, v in sorted(_tokens.items())},
+            "buckets_ms": list(BUCKETS_MS),
+        }
+
+
+def summary(snap: Optional[dict] = None) -> Dict[str, dict]:
+    # Per group totals, e.g. {"alpaca": {"calls": 42, "seconds": 3.1, "bytes": 120000, "tokens": 0}}.
+    # Seconds count only outermost spans per group, so nested ops are not double counted.
+    snap = snap or snapshot()
+    out = defaultdict(lambda: {"calls": 0, "errors": 0, "seconds": 0.0, "bytes": 0, "tokens": 0})
+    for name, c in snap["calls"].items():
+        g = out[name.split(".", 1)[0]]
+        g["calls"] += c["count"]
+        g["errors"] += c["errors"]
+        g["seconds"] += c.get("outer_seconds", c["seconds"])
+    for name, b in snap["bytes"].items():
+        out[name.split(".", 1)[0]]["bytes"] += b["read"] + b["written"]
+    for model, t in snap["tokens"].items():
+        out["openai"]["tokens"] += t["prompt"] + t["completion"]
+    return {k: dict(v, seconds=round(v["seconds"], 3)) for k, v in sorted(out.items())}
+
+
+def write_run_metrics(path: Optional[str] = None, **extra) -> str:
+    path = path or RUN_METRICS_FILE
+    snap = snapshot()
+    row = {"timestamp": datetime.now(timezone.utc).isoformat(), "summary": summary(snap), **snap, **extra}
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    return path
@@ -0,0 +1,87 @@
+import os
+import json
+import hashlib
+import tempfile
+
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+
+# off: always call the API. record: serve stored responses, call and store on a
+# miss. replay: serve stored responses only and raise LLMCacheMiss otherwise.
+MODES = ("off", "record", "replay")
+DEFAULT_DIR = os.path.join("Scripts and CSV Files", "llm_cache")
+
+_config = {
+    "mode": os.getenv("LLM_CACHE_MODE", "off"),
+    "dir": os.getenv("LLM_CACHE_DIR", DEFAULT_DIR),
+}
+
+
+class LLMCacheMiss(KeyError):
+    pass
+
+
+def configure(mode: Optional[str] = None, directory: Optional[str] = None) -> None:
+    if mode is not None:
+        if mode not in MODES:
+            raise ValueError(f"LLM cache mode must be one of {MODES}, got {mode!r}")
+        _config["mode"] = mode
+    if directory:
+        _config["dir"] = directory
+
+
+@contextmanager
+def configured(mode: Optional[str] = None, directory: Optional[str] = None):
+    # configure() for the duration of a block, then put the previous settings back.
+    saved = dict(_config)
+    try:
+        configure(mode, directory)
+        yield
+    finally:
+        _config.update(saved)
+
+
+def cache_key(model: str, temperature: float, prompt: str) -> str:
+    payload = json.dumps({"model": model, "temperature": float(temperature), "prompt": prompt}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _path(key: str) -> str:
+    return os.path.join(_config["dir"], key[:2], f"{key}.json")
+
+
+def _valid(content: str, validate: Optional[Callable[[str], object]]) -> bool:
+    if validate is None:
+        return True
+    try:
+        validate(content)
+        return True
+    except Exception:
+        return False
+
+
+def cached_completion(model: str, temperature: float, prompt: str, call: Callable[[], str], validate: Optional[Callable[[str], object]] = None) -> str:
+    # validate raises on a response the caller cannot use; such responses are
+    # never stored, and a stored one that fails is treated as a miss.
+    mode = _config["mode"]
+    if mode == "off":
+        return call()
+    key = cache_key(model, temperature, prompt)
+    path = _path(key)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            content = json.load(f)["content"]
+        if _valid(content, validate):
+            return content
+    if mode == "replay":
+        raise LLMCacheMiss(f"No recorded {model} response for prompt {key[:12]}")
+    content = call()
+    if not _valid(content, validate):
+        return content
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp_", dir=os.path.dirname(path))
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"model": model, "temperature": float(temperature), "prompt": prompt, "content": content}, f, ensure_ascii=False)
+    os.replace(tmp, path)
+    return content
@@ -1,6 +1,6 @@
 import os
-import time
 import random
+import asyncio
 
 from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
@@ -8,29 +8,20 @@ from datetime import datetime, timezone
 
 from .config_loader import load_settings
 from .thesis import load_thesis, save_thesis
-from .alpaca_service import make_alpaca, get_account, get_clock, submit_order, get_order
-from .market_data import enrich_symbol
-from .risk_engine import validate_symbol, make_client_order_id
-from .openai_agent import get_portfolio_prompt, ask_openai
-from .plotting import plot_weekly_performance
-from .storage import save_trade_log, append_total_row, load_latest_total_equity, iso_now_utc
-from .portfolio import load_portfolio, summarize_portfolio_for_prompt
-from .universe_builder import auto_universe
-from .risk_controls import breached_daily_drawdown, flatten_all, make_bracket_kwargs
-from .db import init_db, insert_trade
-from .market_health import market_is_healthy
+from .risk_engine import make_client_order_id
+from .db import init_db, insert_trades
 from .thesis_change import thesis_changed
-from .multi_model_voter import vote_orders
 from .budget_rebalancer import rebalance, save_virtual_equity
 from .state import load_state, save_state
-from .market_forecast import next_day_forecast
-from .reporter import build_report_html, send_email_html
-from .report_utils import save_equity_chart, save_pnl_chart, write_csv_snapshots, compute_risk_alerts, load_inception_equity
-from .site_publisher import publish_dashboard
+
+# pandas, alpaca_trade_api, openai and matplotlib are imported by the stages
+# that use them, so runs that stop early (RUN_UNTIL) don't pay for them.
 
 
 
 def update_portfolio_totals(alpaca, portfolio_csv: str) -> None:
+    from .alpaca_service import get_account
+    from .storage import append_total_row, iso_now_utc
     account = get_account(alpaca)
     ts = iso_now_utc()
     row = {
@@ -50,37 +41,30 @@ def update_portfolio_totals(alpaca, portfolio_csv: str) -> None:
     append_total_row(portfolio_csv, row)
 
 
-def execute_trade(alpaca, order: dict, limit_price: float, settings: dict, dry_run: bool = False, client_order_id: str = "") -> dict:
+def submit_trade(alpaca, order: dict, limit_price: float, settings: dict, client_order_id: str = ""):
+    from .alpaca_service import submit_order
+    from .risk_controls import make_bracket_kwargs
+    kwargs = {"symbol": order["ticker"], "qty": int(order["shares"]), "side": order["side"], "type": "limit", "limit_price": float(limit_price), "time_in_force": "day", "client_order_id": client_order_id}
+    kwargs.update(make_bracket_kwargs(float(limit_price), settings))
+    return submit_order(alpaca, **kwargs)
+
+
+def trade_result(order: dict, s, limit_price: float, dry_run: bool = False) -> dict:
     side = order["side"]
     symbol = order["ticker"]
-    qty = int(order["shares"])
     reason = order.get("reason", "AUTO TRADE")
     if dry_run:
-        return {"status": "dry_run", "symbol": symbol, "side": side, "qty": qty, "reason": reason, "limit_price": limit_price}
-    kwargs = {"symbol": symbol, "qty": qty, "side": side, "type": "limit", "limit_price": float(limit_price), "time_in_force": "day", "client_order_id": client_order_id}
-    kwargs.update(make_bracket_kwargs(float(limit_price), settings))
-    o = submit_order(alpaca, **kwargs)
-    oid = o.id
-    for _ in range(30):
-        time.sleep(1)
-        s = get_order(alpaca, oid)
-        if s.status in {"filled", "canceled", "rejected", "partially_filled", "expired"}:
-            return {
-                "status": s.status,
-                "symbol": symbol,
-                "side": side,
-                "qty": float(s.filled_qty or 0),
-                "order_id": oid,
-                "reason": reason,
-                "filled_avg_price": float(getattr(s, "filled_avg_price", 0) or 0)
-            }
-    s = get_order(alpaca, oid)
+        return {"status": "dry_run", "symbol": symbol, "side": side, "qty": int(order["shares"]), "reason": reason, "limit_price": limit_price}
+    if s is None:
+        return {"status": "error", "symbol": symbol, "side": side, "qty": 0.0, "order_id": "", "reason": reason, "filled_avg_price": 0.0}
+    from .order_tracker import TERMINAL
+    # Still working at the deadline (possibly partially filled): report what filled so far.
     return {
-        "status": s.status,
+        "status": s.status if s.status in TERMINAL else "timeout",
         "symbol": symbol,
         "side": side,
         "qty": float(s.filled_qty or 0),
-        "order_id": oid,
+        "order_id": s.id,
         "reason": reason,
         "filled_avg_price": float(getattr(s, "filled_avg_price", 0) or 0)
     }
@@ -93,104 +77,70 @@ def _local_timestamp_and_subject(tz_name: str = "Europe/Amsterdam"):
     return as_of_str, subject
 
 
-def _intraday_unrealized_pl(alpaca) -> float:
-    try:
-        total = 0.0
-        for p in alpaca.list_positions():
-            val = getattr(p, "unrealized_intraday_pl", None)
-            if val is not None:
-                total += float(val)
-        return total
-    except Exception:
-        return 0.0
-
-
-def _total_unrealized_pl(alpaca) -> float:
-    try:
-        s = 0.0
-        for p in alpaca.list_positions():
-            v = getattr(p, "unrealized_pl", None)
-            if v is not None:
-                s += float(v)
-        return s
-    except Exception:
-        return 0.0
-
-
-def _top_and_worst_today(alpaca):
-    try:
-        items = []
-        for p in alpaca.list_positions():
-            sym = getattr(p, "symbol", "")
-            pc = getattr(p, "unrealized_intraday_plpc", None)
-            try:
-                pct = float(pc) if pc is not None else 0.0
-            except Exception:
-                pct = 0.0
-            items.append((sym, pct))
-        if not items:
-            return None, None
-        top = max(items, key=lambda x: x[1])
-        worst = min(items, key=lambda x: x[1])
-        return top, worst
-    except Exception:
-        return None, None
-
-
 def _fill_spread_candidates(alpaca, uni_syms, df, existing, target_count, settings):
+    from .market_data import enrich_symbols
+    from .risk_batch import validate_symbols
     have = {c["ticker"] for c in existing}
     held = set(df["Ticker"].astype(str).tolist()) if df is not None and not df.empty else set()
     pool = [s for s in uni_syms if s not in have and s not in held]
     random.shuffle(pool)
     out = list(existing)
-    for sym in pool:
-        if len(out) >= target_count:
-            break
+    i = 0
+    while len(out) < target_count and i < len(pool):
+        # Enrich a few spares per missing slot so one bulk lookup usually suffices.
+        window = pool[i:i + max(3 * (target_count - len(out)), 10)]
+        i += len(window)
         try:
-            meta = enrich_symbol(alpaca, sym)
-            if not validate_symbol(meta, settings):
+            metas = enrich_symbols(alpaca, window)
+        except Exception:
+            continue
+        valid = validate_symbols(metas, settings)
+        for sym in window:
+            if len(out) >= target_count:
+                break
+            meta = metas.get(sym)
+            if not meta or not valid.get(sym):
                 continue
             price = float(meta["price"])
             if price <= 0:
                 continue
             out.append({"ticker": sym, "price": price, "reason": "SPREAD_FILL"})
-        except Exception:
-            continue
     return out
 
 
-def send_daily_report(alpaca, df, ai_thesis, trades_today, port_json, settings, state, state_path):
-    acct = get_account(alpaca)
+def _forecast_context(port_json, thesis) -> str:
+    return f"Holdings JSON: {port_json}\nThesis: {thesis}"
+
+
+def send_daily_report(alpaca, df, ai_thesis, trades_today, port_json, settings, state, state_path, forecast: str | None = None):
+    from .report_context import build_report_context
+    from .report_utils import render_report_charts, write_csv_snapshots, compute_risk_alerts, load_equity_metrics
+    from .risk_analytics import load_portfolio_risk
+    from .market_forecast import next_day_forecast
+    from .reporter import build_report_html, send_email_html
+    from .site_publisher import publish_dashboard
+    from . import instrumentation
+    ctx = build_report_context(alpaca, df, settings)
     tz = settings.get("timezone", "Europe/Amsterdam")
-    from zoneinfo import ZoneInfo
     today_local = datetime.now(ZoneInfo(tz)).date()
     if state.get("daily_baseline_date") != str(today_local):
         state["daily_baseline_date"] = str(today_local)
-        state["daily_baseline_equity"] = float(acct.equity)
+        state["daily_baseline_equity"] = ctx.equity
         save_state(state_path, state)
-    equity_val = float(acct.equity)
-    cash_val = float(acct.cash)
-    baseline = float(state.get("daily_baseline_equity", equity_val))
-    daily_pnl = equity_val - baseline
+    baseline = float(state.get("daily_baseline_equity", ctx.equity))
+    daily_pnl = ctx.equity - baseline
     as_of_iso, subject = _local_timestamp_and_subject(tz)
-    eq_path = save_equity_chart(settings["portfolio_csv"], settings["plot_dir"])
-    pnl_path = save_pnl_chart(settings["portfolio_csv"], settings["plot_dir"])
-    tickers = df["Ticker"].astype(str).tolist() if df is not None and not df.empty else []
-    sectors = {}
-    for sym in tickers:
-        try:
-            meta = enrich_symbol(alpaca, sym)
-            sectors[sym] = meta.get("sector", "Unknown")
-        except Exception:
-            sectors[sym] = "Unknown"
-    alerts = compute_risk_alerts(df, equity_val, settings, sectors)
-    attachments = write_csv_snapshots(df, trades_today, settings.get("report_dir", settings["plot_dir"]))
+    charts = render_report_charts(settings["portfolio_csv"], settings["plot_dir"], history=ctx.history)
+    eq_path, pnl_path = charts["equity"], charts["pnl"]
+    try:
+        portfolio_risk = load_portfolio_risk(alpaca, ctx.positions_df, settings)
+    except Exception as e:
+        print("Portfolio risk analytics failed:", repr(e))
+        portfolio_risk = None
+    alerts = compute_risk_alerts(ctx.positions_df, ctx.equity, settings, ctx.sectors, portfolio_risk)
+    attachments = write_csv_snapshots(ctx.positions_df, trades_today, settings.get("report_dir", settings["plot_dir"]))
     vote_summary = "Multi-model voting enabled" if settings.get("vote", {}).get("enabled", True) else ""
-    intraday_pl = _intraday_unrealized_pl(alpaca)
-    vote_summary = (vote_summary + f" • Intraday UPL: ${intraday_pl:,.2f}").strip(" •")
-    inception_eq = load_inception_equity(settings["portfolio_csv"])
-    total_pl = float(equity_val) - float(inception_eq)
-    top, worst = _top_and_worst_today(alpaca)
+    vote_summary = (vote_summary + f" • Intraday UPL: ${ctx.intraday_pl:,.2f}").strip(" •")
 
     inline_images = {}
     inline_cid = None
@@ -206,21 +156,23 @@ def send_daily_report(alpaca, df, ai_thesis, trades_today, port_json, settings,
 
     html = build_report_html(
         trades_today=trades_today,
-        positions_df=df,
+        positions_df=ctx.positions_df,
         thesis=ai_thesis,
-        forecast=next_day_forecast(f"Holdings JSON: {port_json}\nThesis: {ai_thesis}"),
-        equity=equity_val,
-        cash=cash_val,
+        forecast=forecast if forecast is not None else next_day_forecast(_forecast_context(port_json, ai_thesis)),
+        equity=ctx.equity,
+        cash=ctx.cash,
         daily_pnl=daily_pnl,
         as_of_iso=as_of_iso,
         vote_summary=vote_summary,
         inline_cid=inline_cid,
         pnl_cid=pnl_cid,
-        total_pl=total_pl,
+        total_pl=ctx.total_pl,
         risk_alerts=alerts,
         news_by_ticker=None,
-        top_performer=top,
-        worst_performer=worst
+        top_performer=ctx.top_performer,
+        worst_performer=ctx.worst_performer,
+        performance=load_equity_metrics(settings["portfolio_csv"], history=ctx.history),
+        run_metrics=instrumentation.summary()
     )
 
     try:
@@ -229,10 +181,10 @@ def send_daily_report(alpaca, df, ai_thesis, trades_today, port_json, settings,
             inline_images,
             attachments,
             settings,
-            equity_val,
-            cash_val,
+            ctx.equity,
+            ctx.cash,
             daily_pnl,
-            total_pl,
+            ctx.total_pl,
             as_of_iso
         )
     except Exception as e:
@@ -241,42 +193,25 @@ def send_daily_report(alpaca, df, ai_thesis, trades_today, port_json, settings,
     send_email_html(subject, html, inline_images, attachments)
 
 
-def main():
-    cutoff = os.getenv("RUN_UNTIL")  # e.g., 2025-09-01
-    if cutoff:
-        today = datetime.utcnow().date()
-        if today > datetime.strptime(cutoff, "%Y-%m-%d").date():
-            return
-
-    init_db()
-    load_dotenv()
-    settings_path = os.path.join(os.path.dirname(__file__), "config", "settings.json")
-    settings = load_settings(settings_path)
-    alpaca = make_alpaca()
-
-    old_equity = load_latest_total_equity(settings["portfolio_csv"])
-    start_equity_today = float(get_account(alpaca).equity)
-
-    df, cash_live = load_portfolio(alpaca)
-    thesis_path = settings["thesis_file"]
-    last_thesis = load_thesis(thesis_path)
-    port_json = summarize_portfolio_for_prompt(df)
-
-    state_path = settings.get("state_file", os.path.join(os.path.dirname(__file__), "state.json"))
-    state = load_state(state_path)
-
+def _refresh_universe(alpaca, settings, state, state_path):
+    from .universe_builder import auto_universe
     try:
         uni_syms = auto_universe(alpaca, settings)
         if uni_syms:
             state["last_universe"] = uni_syms
             save_state(state_path, state)
+        return uni_syms
     except Exception:
         uni_syms = state.get("last_universe", [])
         if not uni_syms:
             uni_syms = ["ABEO", "ADMA", "SLS", "TRVN", "CRMD", "CTXR"]
+        return uni_syms
 
-    base_prompt = get_portfolio_prompt(port_json, cash_live, last_thesis, week=6) + f" Only choose from: {uni_syms[:50]}"
+
+def _ask_ai(base_prompt, settings):
+    from .openai_agent import ask_openai
     if settings.get("vote", {}).get("enabled", True):
+        from .multi_model_voter import vote_orders
         voted_orders, voted_thesis = vote_orders(base_prompt, settings)
         class _Tmp: pass
         ai = _Tmp()
@@ -284,108 +219,139 @@ def main():
         for o in voted_orders:
             ai.orders.append(type("O", (object,), o))
         ai.thesis = voted_thesis
-    else:
-        ai = ask_openai(base_prompt)
+        return ai
+    return ask_openai(base_prompt)
+
+
+def _place_orders(alpaca, validated_orders, settings):
+    from .order_tracker import OrderTracker
+    # Submit everything first, then wait on all orders together.
+    dry_run = bool(settings["dry_run"])
+    timing = settings.get("trade_timing", {})
+    tracker = OrderTracker(alpaca, timeout=float(timing.get("fill_timeout_seconds", 30)), stream=bool(timing.get("stream_updates", True)), stream_share=float(timing.get("stream_share", 0.5)))
+    submitted = []
+    if validated_orders and not dry_run:
+        tracker.start()
+    for vo in validated_orders:
+        if dry_run:
+            submitted.append(None)
+            continue
+        try:
+            submitted.append(submit_trade(alpaca, vo, limit_price=vo["limit_price"], settings=settings, client_order_id=make_client_order_id("chatgptbot", vo["ticker"])))
+        except Exception as e:
+            print(f"Order submit failed for {vo['ticker']}:", repr(e))
+            submitted.append(None)
+    tracker.track(o for o in submitted if o is not None)
+    final = tracker.wait()
+    return [trade_result(vo, final.get(o.id, o) if o is not None else None, vo["limit_price"], dry_run) for vo, o in zip(validated_orders, submitted)]
+
+
+async def _run(timer):
+    from .alpaca_service import make_alpaca, get_account, get_clock
+    from .storage import save_trade_log, load_latest_total_equity, iso_now_utc
+    from .portfolio import load_portfolio, summarize_portfolio_for_prompt
+    from .openai_agent import get_portfolio_prompt
+    from .plotting import plot_weekly_performance
+    from .market_health import market_is_healthy
+    from .market_data import enrich_symbols
+    from .market_forecast import next_day_forecast
+    from .risk_controls import breached_daily_drawdown, flatten_all
+    from .risk_batch import validate_symbols, position_lookup, size_buys
 
-    acct = get_account(alpaca)
-    equity_live = float(acct.equity)
+    init_db()
+    load_dotenv()
+    settings_path = os.path.join(os.path.dirname(__file__), "config", "settings.json")
+    settings = load_settings(settings_path)
+    alpaca = make_alpaca(settings.get("api_cache"))
+
+    thesis_path = settings["thesis_file"]
+    last_thesis = load_thesis(thesis_path)
+    state_path = settings.get("state_file", os.path.join(os.path.dirname(__file__), "state.json"))
+    state = load_state(state_path)
+
+    # Independent reads: account, portfolio, universe scan and market health.
+    account_t = timer.spawn("account", get_account, alpaca)
+    portfolio_t = timer.spawn("portfolio", load_portfolio, alpaca)
+    universe_t = timer.spawn("universe", _refresh_universe, alpaca, settings, state, state_path)
+    health_t = timer.spawn("market_health", market_is_healthy, alpaca)
+    old_equity = await timer.run("equity_history", load_latest_total_equity, settings["portfolio_csv"])
+    start_equity_today = float((await account_t).equity)
+    df, cash_live = await portfolio_t
+    port_json = summarize_portfolio_for_prompt(df)
+    uni_syms = await universe_t
+
+    base_prompt = get_portfolio_prompt(port_json, cash_live, last_thesis, week=6) + f" Only choose from: {uni_syms[:50]}"
+    ai = await timer.run("vote", _ask_ai, base_prompt, settings)
+
+    # The forecast only needs the new thesis; let it run behind everything else.
+    forecast_t = timer.spawn("forecast", next_day_forecast, _forecast_context(port_json, ai.thesis))
 
     if not thesis_changed(last_thesis, ai.thesis):
         print("Thesis unchanged — skipping trades.")
-        update_portfolio_totals(alpaca, settings["portfolio_csv"])
+        await timer.run("totals", update_portfolio_totals, alpaca, settings["portfolio_csv"])
         new_equity = load_latest_total_equity(settings["portfolio_csv"])
         if old_equity == 0:
             print("Baseline set. Daily Change will be meaningful from next run.")
         else:
             print(f"Daily Change: ${new_equity - old_equity:.2f}")
-        send_daily_report(alpaca, df, ai.thesis, [], port_json, settings, state, state_path)
-        plot_weekly_performance(settings["portfolio_csv"], settings["plot_dir"], interactive=bool(settings["plot_interactive"]))
-        return
-
-    healthy = market_is_healthy(alpaca)
-
-    budget = settings.get("budget", {})
-    max_pos_abs = float(budget.get("max_pos_abs", float("inf")))
+        await health_t
+        await timer.run("report", send_daily_report, alpaca, df, ai.thesis, [], port_json, settings, state, state_path, forecast=await forecast_t)
+        await timer.run("weekly_chart", plot_weekly_performance, settings["portfolio_csv"], settings["plot_dir"], interactive=bool(settings["plot_interactive"]))
+        return alpaca
+
+    # Must not be served the cached start-of-run Account, or the check can never fire.
+    if hasattr(alpaca, "invalidate"):
+        alpaca.invalidate("get_account")
+    drawdown_t = timer.spawn("drawdown_check", get_account, alpaca)
+    clock_t = timer.spawn("clock", get_clock, alpaca)
+    healthy = await health_t
 
     buy_candidates = []
     sell_candidates = []
 
-    for o in ai.orders:
-        if o.ticker not in uni_syms:
-            continue
-        meta = enrich_symbol(alpaca, o.ticker)
-        if not validate_symbol(meta, settings):
-            continue
-        price = float(meta["price"])
-        if o.side == "sell":
-            if not df.empty and o.ticker in df["Ticker"].values:
-                owned = int(float(df[df["Ticker"] == o.ticker]["Shares"].iloc[0]))
-                if owned > 0:
-                    sell_candidates.append({"ticker": o.ticker, "price": price, "max_qty": owned, "reason": o.reason})
-            continue
-        if healthy:
-            buy_candidates.append({"ticker": o.ticker, "price": price, "reason": o.reason})
+    metas = await timer.run("enrich", enrich_symbols, alpaca, [o.ticker for o in ai.orders if o.ticker in uni_syms])
+    valid = validate_symbols(metas, settings)
+    picks = [o for o in ai.orders if o.ticker in uni_syms and valid.get(o.ticker)]
+    sells = [o for o in picks if o.side == "sell"]
+    owned = position_lookup(df, [o.ticker for o in sells], "Shares")
+    for o, qty in zip(sells, owned):
+        if int(qty) > 0:
+            sell_candidates.append({"ticker": o.ticker, "price": float(metas[o.ticker]["price"]), "max_qty": int(qty), "reason": o.reason})
+    if healthy:
+        buy_candidates = [{"ticker": o.ticker, "price": float(metas[o.ticker]["price"]), "reason": o.reason, "votes": getattr(o, "votes", 1)} for o in picks if o.side != "sell"]
 
     target_positions = int(settings.get("spread", {}).get("target_positions", 4))
     if healthy and settings.get("spread", {}).get("enabled", True):
-        buy_candidates = _fill_spread_candidates(alpaca, uni_syms, df, buy_candidates, target_positions, settings)
+        buy_candidates = await timer.run("spread_fill", _fill_spread_candidates, alpaca, uni_syms, df, buy_candidates, target_positions, settings)
 
-    buy_candidates = buy_candidates[:max(int(settings.get("risk", {}).get("max_symbols", target_positions)), target_positions)]
-
-    remaining = float(settings["budget"]["max_daily_allocation_abs"])
-    intended_n = max(1, min(len(buy_candidates), target_positions))
-    per_name = remaining / intended_n if buy_candidates else 0.0
+    buy_candidates = buy_candidates[:target_positions]
+    limits = [round(c["price"] * 1.01, 2) for c in buy_candidates]
+    weights = [c.get("votes", 1) for c in buy_candidates] if settings["budget"].get("weight_by_votes", True) else None
+    qtys = size_buys([c["ticker"] for c in buy_candidates], [c["price"] for c in buy_candidates], limits, df, start_equity_today, cash_live, settings, weights)
 
     validated_orders = []
-    for c in buy_candidates[:intended_n]:
-        price = c["price"]
-        existing_value = 0.0
-        if not df.empty and c["ticker"] in df["Ticker"].values:
-            existing_value = float(df[df["Ticker"] == c["ticker"]]["Total Value"].iloc[0])
-        pos_room_abs = max(0.0, float(max_pos_abs) - existing_value)
-        alloc = min(per_name, pos_room_abs, remaining)
-        qty = int(alloc // price)
-        if qty <= 0:
-            continue
-        limit = round(price * 1.01, 2)
-        validated_orders.append({"ticker": c["ticker"], "side": "buy", "shares": qty, "reason": c["reason"], "limit_price": limit})
-        spent = qty * price
-        remaining -= spent
+    for c, limit, qty in zip(buy_candidates, limits, qtys):
+        if qty > 0:
+            validated_orders.append({"ticker": c["ticker"], "side": "buy", "shares": int(qty), "reason": c["reason"], "limit_price": limit})
 
     for c in sell_candidates:
-        if c["max_qty"] <= 0:
-            continue
         limit = round(c["price"] * 0.99, 2)
         validated_orders.append({"ticker": c["ticker"], "side": "sell", "shares": int(c["max_qty"]), "reason": c["reason"], "limit_price": limit})
 
-    cap = float(settings["budget"]["max_daily_allocation_abs"])
-    spent = 0.0
-    for i, o in enumerate(validated_orders):
-        if o["side"] != "buy":
-            continue
-        price = float(o.get("limit_price") or 0)
-        alloc = o["shares"] * price
-        if spent + alloc <= cap:
-            spent += alloc
-            continue
-        room = max(0.0, cap - spent)
-        max_qty = int(room // price) if price > 0 else 0
-        o["shares"] = max(max_qty, 0)
-        spent += o["shares"] * price
-    validated_orders = [o for o in validated_orders if o["side"] != "buy" or o["shares"] > 0]
-
     planned_spend = sum(o["shares"] * (o.get("limit_price") or 0) for o in validated_orders if o["side"] == "buy")
     print(f"Planned spend today: ${planned_spend:.2f} (cap ${settings['budget']['max_daily_allocation_abs']})")
     print("Validated orders:", validated_orders)
 
-    if breached_daily_drawdown(start_equity_today, float(get_account(alpaca).equity), settings) and settings["drawdown"]["flatten_on_breach"]:
-        flat = flatten_all(alpaca)
-        print("Flattened due to daily drawdown:", flat)
-        update_portfolio_totals(alpaca, settings["portfolio_csv"])
-        send_daily_report(alpaca, df, ai.thesis, [], port_json, settings, state, state_path)
-        return
+    if breached_daily_drawdown(start_equity_today, float((await drawdown_t).equity), settings) and settings["drawdown"]["flatten_on_breach"]:
+        flat = await timer.run("flatten", flatten_all, alpaca, settings)
+        print(f"Flattened due to daily drawdown via {flat['method']} in {flat['seconds']:.2f}s; still held: {flat['remaining'] or 'none'}")
+        for leg in flat["legs"]:
+            print("  ", leg)
+        await timer.run("totals", update_portfolio_totals, alpaca, settings["portfolio_csv"])
+        await timer.run("report", send_daily_report, alpaca, df, ai.thesis, [], port_json, settings, state, state_path, forecast=await forecast_t)
+        return alpaca
 
-    clock = get_clock(alpaca)
+    clock = await clock_t
     place_when_closed = bool(settings.get("trade_timing", {}).get("place_when_market_closed", True))
 
     if clock.is_open:
@@ -397,10 +363,11 @@ def main():
             print("Market closed and placing-when-closed disabled; skipping order placement.")
             validated_orders = []
 
+    results = await timer.run("orders", _place_orders, alpaca, validated_orders, settings)
+
     trades_today = []
-    for vo in validated_orders:
-        client_id = make_client_order_id("chatgptbot", vo["ticker"])
-        res = execute_trade(alpaca, vo, limit_price=vo["limit_price"], settings=settings, dry_run=bool(settings["dry_run"]), client_order_id=client_id)
+    fills = []
+    for vo, res in zip(validated_orders, results):
         trades_today.append({
             "Timestamp": iso_now_utc(),
             "Date": datetime.now(timezone.utc).strftime("%Y-%m-%d"),
@@ -410,11 +377,21 @@ def main():
             "OrderStatus": res.get("status", ""),
             "OrderId": res.get("order_id", "")
         })
-        insert_trade(vo["ticker"], vo["side"], int(vo["shares"]), float(vo["limit_price"]), res.get("status", ""), int(res.get("qty", 0)), float(res.get("filled_avg_price", vo["limit_price"])))
+        fills.append({
+            "timestamp": trades_today[-1]["Timestamp"],
+            "ticker": vo["ticker"],
+            "side": vo["side"],
+            "qty": int(vo["shares"]),
+            "limit_price": float(vo["limit_price"]),
+            "status": res.get("status", ""),
+            "filled_qty": int(res.get("qty", 0)),
+            "filled_avg_price": float(res.get("filled_avg_price", vo["limit_price"]))
+        })
         save_trade_log(settings["trade_log_csv"], trades_today[-1])
+    insert_trades(fills)
 
     save_thesis(thesis_path, ai.thesis or "No thesis returned.")
-    update_portfolio_totals(alpaca, settings["portfolio_csv"])
+    await timer.run("totals", update_portfolio_totals, alpaca, settings["portfolio_csv"])
 
     new_equity = load_latest_total_equity(settings["portfolio_csv"])
 
@@ -425,7 +402,7 @@ def main():
     if changed:
         save_virtual_equity(settings_path, settings, new_virtual)
 
-    send_daily_report(alpaca, df, ai.thesis, trades_today, port_json, settings, state, state_path)
+    await timer.run("report", send_daily_report, alpaca, df, ai.thesis, trades_today, port_json, settings, state, state_path, forecast=await forecast_t)
 
     state["base_equity"] = new_equity
     save_state(state_path, state)
@@ -435,7 +412,34 @@ def main():
     else:
         print(f"Daily Change: ${new_equity - old_equity:.2f}")
 
-    plot_weekly_performance(settings["portfolio_csv"], settings["plot_dir"], interactive=bool(settings["plot_interactive"]))
+    await timer.run("weekly_chart", plot_weekly_performance, settings["portfolio_csv"], settings["plot_dir"], interactive=bool(settings["plot_interactive"]))
+    return alpaca
+
+
+def main():
+    cutoff = os.getenv("RUN_UNTIL")  # e.g., 2025-09-01
+    if cutoff:
+        today = datetime.utcnow().date()
+        if today > datetime.strptime(cutoff, "%Y-%m-%d").date():
+            return
+
+    from .pipeline import StageTimer
+    from . import instrumentation
+    instrumentation.reset()
+    timer = StageTimer()
+    cache_stats = None
+    try:
+        alpaca = asyncio.run(_run(timer))
+        if hasattr(alpaca, "stats"):
+            cache_stats = alpaca.stats()
+            print("Alpaca cache:", cache_stats)
+    finally:
+        if timer.stages:
+            print("Stage timings:\n" + timer.report())
+        try:
+            instrumentation.write_run_metrics(stages=timer.as_dict(), api_cache=cache_stats)
+        except Exception as e:
+            print("Run metrics write failed:", repr(e))
 
 
 if __name__ == "__main__":
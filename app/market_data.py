@@ -1,23 +1,42 @@
-from typing import Optional
-from .alpaca_service import get_asset, get_last_trade_price, get_avg_volume
+from typing import Dict, List, Optional
+from alpaca_trade_api.rest import TimeFrame
+from .alpaca_service import get_asset, get_last_trade_price, get_avg_volume, list_assets_by_symbol, get_last_trade_prices, get_bars_since
+from .bar_store import day_string, today_number
+from .universe_scoring import bars_frame
 
 
-def enrich_symbol(alpaca, symbol: str) -> dict:
-    a = get_asset(alpaca, symbol)
-    price = get_last_trade_price(alpaca, symbol)
-    avg_vol = get_avg_volume(alpaca, symbol, days=20)
-    exchange = getattr(a, "exchange", None)
-    tradable = bool(getattr(a, "tradable", False))
-    marginable = bool(getattr(a, "marginable", False))
-    shortable = bool(getattr(a, "shortable", False))
-    market_cap = None
+def _meta(symbol: str, a, price: float, avg_vol: float) -> dict:
     return {
         "symbol": symbol,
         "price": price,
         "avg_volume": avg_vol,
-        "exchange": exchange,
-        "tradable": tradable,
-        "marginable": marginable,
-        "shortable": shortable,
-        "market_cap": market_cap
+        "exchange": getattr(a, "exchange", None),
+        "tradable": bool(getattr(a, "tradable", False)),
+        "marginable": bool(getattr(a, "marginable", False)),
+        "shortable": bool(getattr(a, "shortable", False)),
+        "market_cap": None
     }
+
+
+def enrich_symbol(alpaca, symbol: str) -> dict:
+    a = get_asset(alpaca, symbol)
+    price = get_last_trade_price(alpaca, symbol)
+    avg_vol = get_avg_volume(alpaca, symbol, days=20)
+    return _meta(symbol, a, price, avg_vol)
+
+
+def enrich_symbols(alpaca, symbols: List[str], days: int = 20, batch_size: int = 200) -> Dict[str, dict]:
+    syms = list(dict.fromkeys(s for s in symbols if s))
+    if not syms:
+        return {}
+    assets = list_assets_by_symbol(alpaca)
+    start = day_string(today_number() - (days * 7 // 5 + 10))
+    prices = {}
+    avg_vols = {}
+    for i in range(0, len(syms), batch_size):
+        batch = syms[i:i+batch_size]
+        prices.update(get_last_trade_prices(alpaca, batch))
+        frame = bars_frame(get_bars_since(alpaca, batch, TimeFrame.Day, start))
+        if not frame.empty:
+            avg_vols.update(frame.groupby("symbol", sort=False).tail(days).groupby("symbol")["volume"].mean().astype(float).to_dict())
+    return {s: _meta(s, assets.get(s), prices.get(s, 0.0), avg_vols.get(s, 0.0)) for s in syms}
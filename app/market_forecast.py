@@ -1,14 +1,17 @@
 import json
 
 from openai import OpenAI
+from .instrumentation import measure, record_tokens
 
 
 def next_day_forecast(prompt_context: str) -> str:
     c = OpenAI()
-    r = c.chat.completions.create(
-        model="gpt-4o-mini",
-        response_format={"type":"text"},
-        temperature=0.4,
-        messages=[{"role":"user","content":f"Given this portfolio and thesis, write a 3-bullet cautious forecast for tomorrow:\n{prompt_context}"}]
-    )
+    with measure("openai.gpt-4o-mini"):
+        r = c.chat.completions.create(
+            model="gpt-4o-mini",
+            response_format={"type":"text"},
+            temperature=0.4,
+            messages=[{"role":"user","content":f"Given this portfolio and thesis, write a 3-bullet cautious forecast for tomorrow:\n{prompt_context}"}]
+        )
+    record_tokens("gpt-4o-mini", getattr(r, "usage", None))
     return r.choices[0].message.content.strip()
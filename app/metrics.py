@@ -0,0 +1,154 @@
+import numpy as np
+
+from typing import Dict, Tuple
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# Every function works along axis 0, so a (days,) equity curve and a
+# (days x strategies) block of curves are handled in the same pass.
+
+PERIODS_PER_YEAR = 252
+
+
+def _arr(x) -> np.ndarray:
+    return np.asarray(x, dtype=np.float64)
+
+
+def returns(equity) -> np.ndarray:
+    # Simple period returns with a leading 0 so the result lines up with equity.
+    e = _arr(equity)
+    r = np.zeros_like(e)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r[1:] = np.where(e[:-1] != 0, e[1:] / e[:-1] - 1.0, 0.0)
+    return r
+
+
+def drawdown(equity) -> np.ndarray:
+    e = _arr(equity)
+    peak = np.maximum.accumulate(e, axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(peak > 0, (peak - e) / peak, 0.0)
+
+
+def max_drawdown(equity):
+    return drawdown(equity).max(axis=0) if len(_arr(equity)) else 0.0
+
+
+def drawdown_duration(equity):
+    # Longest run of periods spent below a previous peak.
+    dd = drawdown(equity)
+    if not len(dd):
+        return 0
+    idx = np.arange(len(dd)).reshape((-1,) + (1,) * (dd.ndim - 1))
+    last_peak = np.maximum.accumulate(np.where(dd <= 0, idx, 0), axis=0)
+    return (idx - last_peak).max(axis=0)
+
+
+def sharpe(r, periods: int = PERIODS_PER_YEAR):
+    r = _arr(r)
+    return r.mean(axis=0) / (r.std(axis=0, ddof=1) + 1e-9) * np.sqrt(periods)
+
+
+def downside_deviation(r):
+    r = _arr(r)
+    return np.sqrt(np.mean(np.minimum(r, 0.0) ** 2, axis=0))
+
+
+def sortino(r, periods: int = PERIODS_PER_YEAR):
+    r = _arr(r)
+    return r.mean(axis=0) / (downside_deviation(r) + 1e-9) * np.sqrt(periods)
+
+
+def volatility(r, periods: int = PERIODS_PER_YEAR):
+    return _arr(r).std(axis=0, ddof=1) * np.sqrt(periods)
+
+
+def _windows(r, window: int) -> np.ndarray:
+    r = _arr(r)
+    if len(r) < window:
+        return np.empty((0,) + r.shape[1:] + (window,))
+    return sliding_window_view(r, window, axis=0)
+
+
+def rolling_volatility(r, window: int = 20, periods: int = PERIODS_PER_YEAR) -> np.ndarray:
+    return _windows(r, window).std(axis=-1, ddof=1) * np.sqrt(periods)
+
+
+def rolling_sharpe(r, window: int = 20, periods: int = PERIODS_PER_YEAR) -> np.ndarray:
+    w = _windows(r, window)
+    return w.mean(axis=-1) / (w.std(axis=-1, ddof=1) + 1e-9) * np.sqrt(periods)
+
+
+def rolling_sortino(r, window: int = 20, periods: int = PERIODS_PER_YEAR) -> np.ndarray:
+    w = _windows(r, window)
+    down = np.sqrt(np.mean(np.minimum(w, 0.0) ** 2, axis=-1))
+    return w.mean(axis=-1) / (down + 1e-9) * np.sqrt(periods)
+
+
+def cagr(equity, periods: int = PERIODS_PER_YEAR):
+    e = _arr(equity)
+    if len(e) < 2:
+        return np.zeros(e.shape[1:]) if e.ndim > 1 else 0.0
+    years = (len(e) - 1) / periods
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(e[0] > 0, (e[-1] / e[0]) ** (1.0 / years) - 1.0, 0.0)
+
+
+def calmar(equity, periods: int = PERIODS_PER_YEAR):
+    mdd = max_drawdown(equity)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(mdd > 0, cagr(equity, periods) / mdd, 0.0)
+
+
+def hit_rate(r):
+    # Share of periods with a gain among periods that moved at all.
+    r = _arr(r)
+    moved = (r != 0).sum(axis=0)
+    return np.where(moved > 0, (r > 0).sum(axis=0) / np.maximum(moved, 1), 0.0)
+
+
+def turnover(traded_value, equity):
+    # Average traded notional per period relative to average equity.
+    mean_eq = _arr(equity).mean(axis=0)
+    traded = np.abs(_arr(traded_value)).mean(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(mean_eq > 0, traded / mean_eq, 0.0)
+
+
+def total_sharpe_sortino(equity, rf_annual: float = 0.045, periods: int = PERIODS_PER_YEAR) -> Tuple[float, float]:
+    # Whole-period ratios: total return in excess of the risk-free return over
+    # the same span, scaled by daily (downside) deviation times sqrt(n).
+    e = _arr(equity)
+    n = len(e)
+    r = returns(e)[1:]
+    total_return = (e[-1] - e[0]) / e[0]
+    rf_period = (1 + rf_annual) ** (n / periods) - 1
+    neg = r[r < 0]
+    std = r.std(ddof=1) if len(r) > 1 else np.nan
+    neg_std = neg.std(ddof=1) if len(neg) > 1 else np.nan
+    return float((total_return - rf_period) / (std * np.sqrt(n))), float((total_return - rf_period) / (neg_std * np.sqrt(n)))
+
+
+def summarize(equity, traded_value=None, window: int = 20, periods: int = PERIODS_PER_YEAR) -> Dict:
+    e = _arr(equity)
+    r = returns(e)
+    out = {
+        "final_equity": e[-1] if len(e) else 0.0,
+        "total_return": np.where(e[0] > 0, e[-1] / e[0] - 1.0, 0.0) if len(e) else 0.0,
+        "sharpe": sharpe(r, periods),
+        "sortino": sortino(r, periods),
+        "volatility": volatility(r, periods),
+        "max_drawdown": max_drawdown(e),
+        "drawdown_duration": drawdown_duration(e),
+        "cagr": cagr(e, periods),
+        "calmar": calmar(e, periods),
+        "hit_rate": hit_rate(r[1:]),
+        "rolling_sharpe": rolling_sharpe(r[1:], window, periods),
+        "rolling_sortino": rolling_sortino(r[1:], window, periods),
+        "rolling_volatility": rolling_volatility(r[1:], window, periods),
+    }
+    if traded_value is not None:
+        out["turnover"] = turnover(traded_value, e)
+    if e.ndim == 1:
+        return {k: (v.tolist() if isinstance(v, np.ndarray) and v.ndim else float(v)) for k, v in out.items()}
+    return out
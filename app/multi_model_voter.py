@@ -1,33 +1,42 @@
-import json
+import time
+import threading
 
 from collections import defaultdict
-from typing import List, Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Optional, Tuple
 from openai import OpenAI
 from .schemas import AIResponse
+from .openai_agent import parse_response
+from .llm_cache import cached_completion
+from .instrumentation import measure, record_tokens
 
 
-def _ask(model: str, prompt: str) -> AIResponse:
-    c = OpenAI()
-    r = c.chat.completions.create(model=model, response_format={"type":"json_object"}, temperature=0.2, messages=[{"role":"user","content":prompt}])
-    data = json.loads(r.choices[0].message.content)
-    return AIResponse(**data)
+_client = None
+_client_lock = threading.Lock()
 
 
-def vote_orders(prompt: str, settings: dict) -> Tuple[List[Dict], str]:
-    models = settings.get("vote", {}).get("models", ["gpt-4o"])
-    min_votes = int(settings.get("vote", {}).get("min_votes", 2))
-    ballots = []
-    theses = []
+def _shared_client() -> OpenAI:
+    # One client (and one HTTP connection pool) for every ballot in the process.
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OpenAI()
+        return _client
 
-    for m in models:
-        a = _ask(m, prompt)
-        theses.append(a.thesis or "")
-        rows = []
 
-        for o in a.orders:
-            rows.append({"ticker": o.ticker.upper(), "side": o.side.lower(), "shares": float(o.shares), "reason": o.reason})
-        ballots.append(rows)
+def _ask(model: str, prompt: str, timeout: Optional[float] = None) -> AIResponse:
+    def call() -> str:
+        c = _shared_client()
+        if timeout:
+            c = c.with_options(timeout=timeout)
+        with measure(f"openai.{model}"):
+            r = c.chat.completions.create(model=model, response_format={"type":"json_object"}, temperature=0.2, messages=[{"role":"user","content":prompt}])
+        record_tokens(model, getattr(r, "usage", None))
+        return r.choices[0].message.content
+    return parse_response(cached_completion(model, 0.2, prompt, call, validate=parse_response))
 
+
+def _tally(ballots: List[List[Dict]]):
     counts = defaultdict(int)
     reasons = defaultdict(list)
 
@@ -44,12 +53,70 @@ def vote_orders(prompt: str, settings: dict) -> Tuple[List[Dict], str]:
             counts[key] += 1
             reasons[key].append(o.get("reason",""))
 
+    return counts, reasons
+
+
+def _decided(counts: Dict, collected: int, remaining: int, min_votes: int) -> bool:
+    # The outcome is fixed once no outstanding ballot can push any order, seen or
+    # unseen, across the min_votes line. Until one ballot is in there is no
+    # thesis to return, so outstanding calls are always waited for.
+    if not collected or remaining >= min_votes:
+        return False
+    return all(v >= min_votes or v + remaining < min_votes for v in counts.values())
+
+
+def vote_orders(prompt: str, settings: dict) -> Tuple[List[Dict], str]:
+    models = settings.get("vote", {}).get("models", ["gpt-4o"])
+    min_votes = int(settings.get("vote", {}).get("min_votes", 2))
+    timeout = float(settings.get("vote", {}).get("timeout_seconds", 60))
+    results = {}
+
+    ex = ThreadPoolExecutor(max_workers=max(1, len(models)))
+    deadline = time.monotonic() + timeout
+    try:
+        futures = {ex.submit(_ask, m, prompt, timeout): i for i, m in enumerate(models)}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                print(f"Voting timed out waiting for {len(pending)} model(s).")
+                break
+            for f in done:
+                i = futures[f]
+                try:
+                    results[i] = f.result()
+                except Exception as e:
+                    print(f"Vote from {models[i]} failed:", repr(e))
+            ballots = [[{"ticker": o.ticker.upper(), "side": o.side.lower()} for o in a.orders] for a in results.values()]
+            if _decided(_tally(ballots)[0], len(results), len(pending), min_votes):
+                break
+    finally:
+        ex.shutdown(wait=False, cancel_futures=True)
+
+    if not results:
+        raise RuntimeError("No voting model returned a ballot.")
+
+    # Ballots are merged in model order so reasons and the chosen thesis do not
+    # depend on which model answered first.
+    ballots = []
+    theses = []
+
+    for i in sorted(results):
+        a = results[i]
+        theses.append(a.thesis or "")
+        rows = []
+
+        for o in a.orders:
+            rows.append({"ticker": o.ticker.upper(), "side": o.side.lower(), "shares": float(o.shares), "reason": o.reason})
+        ballots.append(rows)
+
+    counts, reasons = _tally(ballots)
     agreed = []
 
     for key, v in counts.items():
         if v >= min_votes:
             t, s = key
-            agreed.append({"ticker": t, "side": s, "shares": 100, "reason": " | ".join(reasons[key])[:500]})
+            agreed.append({"ticker": t, "side": s, "shares": 100, "reason": " | ".join(reasons[key])[:500], "votes": v})
 
     thesis = max(theses, key=lambda x: len(x)) if theses else ""
     return agreed, thesis
@@ -3,6 +3,8 @@ import json
 
 from openai import OpenAI
 from .schemas import AIResponse
+from .llm_cache import cached_completion
+from .instrumentation import measure, record_tokens
 
 def get_portfolio_prompt(portfolio_summary_json: str, cash: float, previous_thesis: str, week: int) -> str:
     return (
@@ -16,14 +18,20 @@ def get_portfolio_prompt(portfolio_summary_json: str, cash: float, previous_thes
         f'{{"orders":[{{"ticker":"XYZ","side":"buy","shares":10,"reason":"r"}}], "thesis":"t"}}'
     )
 
+def parse_response(content: str) -> AIResponse:
+    return AIResponse(**json.loads(content))
+
 def ask_openai(prompt: str) -> AIResponse:
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    r = client.chat.completions.create(
-        model="gpt-4o",
-        response_format={"type": "json_object"},
-        temperature=0.2,
-        messages=[{"role": "user", "content": prompt}],
-    )
-    content = r.choices[0].message.content
-    data = json.loads(content)
-    return AIResponse(**data)
+    def call() -> str:
+        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        with measure("openai.gpt-4o"):
+            r = client.chat.completions.create(
+                model="gpt-4o",
+                response_format={"type": "json_object"},
+                temperature=0.2,
+                messages=[{"role": "user", "content": prompt}],
+            )
+        record_tokens("gpt-4o", getattr(r, "usage", None))
+        return r.choices[0].message.content
+    content = cached_completion("gpt-4o", 0.2, prompt, call, validate=parse_response)
+    return parse_response(content)
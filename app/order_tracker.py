@@ -0,0 +1,131 @@
+import time
+import threading
+
+from typing import Dict, Iterable, Optional
+from datetime import datetime, timedelta, timezone
+from alpaca_trade_api.entity import Order
+from .alpaca_service import list_orders, make_trade_stream
+
+
+# partially_filled is not here: the rest of the order is still working.
+TERMINAL = {"filled", "canceled", "rejected", "expired"}
+
+
+class OrderTracker:
+    # Waits on many submitted orders at once. Trade updates from the websocket
+    # mark orders done as they settle; anything the stream missed (or all of it,
+    # when the stream can't connect) is picked up by one batched list_orders
+    # poll with exponential backoff. Every order shares one deadline.
+    def __init__(self, alpaca, timeout: float = 30.0, stream: bool = True, stream_share: float = 0.5):
+        self.alpaca = alpaca
+        self.timeout = float(timeout)
+        # Fraction of the timeout the stream gets on its own before polling starts.
+        self.stream_share = min(max(float(stream_share), 0.0), 1.0)
+        self.use_stream = stream
+        self.started = datetime.now(timezone.utc)
+        self._orders: Dict[str, object] = {}
+        self._tracked: set = set()
+        # order id -> time.monotonic() when the order was first seen terminal
+        self.settled_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._stream = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "OrderTracker":
+        # Call before submitting, so fills that land right away are not missed.
+        if not self.use_stream:
+            return self
+        try:
+            self._stream = make_trade_stream()
+            self._stream.subscribe_trade_updates(self._on_update)
+            self._thread = threading.Thread(target=self._stream.run, name="trade-updates", daemon=True)
+            self._thread.start()
+        except Exception as e:
+            print("Trade update stream unavailable, polling instead:", repr(e))
+            self._stream = None
+        return self
+
+    async def _on_update(self, data):
+        order = getattr(data, "order", None)
+        if not order:
+            return
+        o = Order(order)
+        with self._lock:
+            self._store(o)
+            self._check()
+
+    def _store(self, o) -> None:
+        self._orders[o.id] = o
+        if getattr(o, "status", None) in TERMINAL:
+            self.settled_at.setdefault(o.id, time.monotonic())
+
+    def _pending(self):
+        return [oid for oid in self._tracked if getattr(self._orders.get(oid), "status", None) not in TERMINAL]
+
+    def _check(self) -> None:
+        if self._tracked and not self._pending():
+            self._done.set()
+        else:
+            self._done.clear()
+
+    def track(self, orders: Iterable) -> None:
+        with self._lock:
+            for o in orders:
+                self._tracked.add(o.id)
+                if o.id not in self._orders:
+                    self._store(o)
+            self._check()
+
+    def untrack(self, ids: Iterable[str]) -> None:
+        # Lets one started tracker wait on several batches in turn.
+        with self._lock:
+            self._tracked.difference_update(ids)
+            self._check()
+
+    def _poll(self) -> None:
+        # A minute of slack for clock skew; results are matched by order id anyway.
+        after = (self.started - timedelta(minutes=1)).replace(microsecond=0).isoformat()
+        rows = list_orders(self.alpaca, status="all", after=after, limit=500, nested=False)
+        with self._lock:
+            for o in rows:
+                if o.id in self._tracked:
+                    self._store(o)
+            self._check()
+
+    def wait(self, stop: bool = True) -> Dict[str, object]:
+        # stop=False keeps the stream open for another batch; call stop() when done.
+        if not self._tracked:
+            if stop:
+                self.stop()
+            return {}
+        deadline = time.monotonic() + self.timeout
+        if self._stream is not None:
+            # Stream alone for stream_share of the timeout, then poll for the rest.
+            self._done.wait(self.timeout * self.stream_share)
+        delay = 0.5
+        while not self._done.is_set():
+            try:
+                self._poll()
+            except Exception as e:
+                print("Order status poll failed:", repr(e))
+            left = deadline - time.monotonic()
+            if self._done.is_set() or left <= 0:
+                break
+            self._done.wait(min(delay, left))
+            delay = min(delay * 2, 8.0)
+        if stop:
+            self.stop()
+        with self._lock:
+            pending = self._pending()
+            if pending:
+                print(f"Timed out after {self.timeout:.0f}s waiting on {len(pending)} order(s):", ", ".join(sorted(pending)))
+            return {oid: self._orders[oid] for oid in self._tracked}
+
+    def stop(self) -> None:
+        if self._stream is not None:
+            try:
+                self._stream.stop()
+            except Exception:
+                pass
+            self._stream = None
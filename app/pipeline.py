@@ -0,0 +1,36 @@
+import time
+import asyncio
+
+from typing import List, Tuple
+
+
+class StageTimer:
+    # Runs blocking stages on worker threads so independent ones overlap, and
+    # records when each started and finished relative to the run start.
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.stages: List[Tuple[str, float, float]] = []
+
+    async def run(self, name: str, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await asyncio.to_thread(fn, *args, **kwargs)
+        finally:
+            self.stages.append((name, start - self.t0, time.perf_counter() - self.t0))
+
+    def spawn(self, name: str, fn, *args, **kwargs) -> asyncio.Task:
+        return asyncio.create_task(self.run(name, fn, *args, **kwargs))
+
+    def as_dict(self) -> dict:
+        return {name: round(end - start, 3) for name, start, end in self.stages}
+
+    def report(self) -> str:
+        if not self.stages:
+            return ""
+        wall = max(end for _, _, end in self.stages)
+        busy = sum(end - start for _, start, end in self.stages)
+        lines = [f"{'stage':<16}{'start':>8}{'secs':>8}"]
+        for name, start, end in sorted(self.stages, key=lambda s: s[1]):
+            lines.append(f"{name:<16}{start:>8.2f}{end - start:>8.2f}")
+        lines.append(f"wall {wall:.2f}s, stage time {busy:.2f}s")
+        return "\n".join(lines)
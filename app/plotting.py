@@ -1,26 +1,25 @@
-import os
-import pandas as pd
-import matplotlib.pyplot as plt
+from .charts import RENDERERS, render_charts
+from .equity_store import EquityHistory, load_equity_history
 
 
-def plot_weekly_performance(portfolio_csv: str, plot_dir: str, interactive: bool = False) -> str:
-    os.makedirs(plot_dir, exist_ok=True)
-    df = pd.read_csv(portfolio_csv)
-    df = df[df["Ticker"] == "TOTAL"].copy()
-    df["Timestamp"] = pd.to_datetime(df["Timestamp"], utc=True)
+WEEKLY_NAME = "weekly_performance.png"
+
+
+def weekly_chart_job(hist: EquityHistory):
+    df = hist.frame()
     df = df[df["Timestamp"].dt.dayofweek == 0]
-    fig = plt.figure(figsize=(10, 5))
-    plt.plot(df["Timestamp"], df["Total Equity"], marker="o", label="ChatGPT Portfolio")
-    plt.title("Weekly Portfolio Performance")
-    plt.xlabel("Date")
-    plt.ylabel("Total Equity ($)")
-    plt.xticks(rotation=30)
-    plt.grid(True)
-    plt.legend()
-    path = os.path.join(plot_dir, "weekly_performance.png")
-    fig.tight_layout()
-    fig.savefig(path, dpi=120)
+    return ("weekly", WEEKLY_NAME, df["Timestamp"].to_numpy(), df["Total Equity"].to_numpy())
+
+
+def plot_weekly_performance(portfolio_csv: str, plot_dir: str, interactive: bool = False) -> str:
+    job = weekly_chart_job(load_equity_history(portfolio_csv))
+    path = render_charts(plot_dir, [job])[WEEKLY_NAME]
     if interactive:
+        import matplotlib.pyplot as plt
+        draw, figsize, _ = RENDERERS["weekly"]
+        fig = plt.figure(figsize=figsize)
+        draw(fig, job[2], job[3])
+        fig.tight_layout()
         plt.show()
-    plt.close(fig)
+        plt.close(fig)
     return path
@@ -0,0 +1,82 @@
+import os
+import json
+import numpy as np
+
+from typing import Dict, List, Tuple
+from .bar_store import BarStore, COL
+
+
+FIELDS = ("open", "close", "volume")
+
+
+class PriceMatrix:
+    # Daily bars for a fixed symbol set aligned on one session calendar:
+    # every field is a (days x symbols) float array with NaN for missing bars.
+    def __init__(self, days: np.ndarray, symbols: List[str], open: np.ndarray, close: np.ndarray, volume: np.ndarray):
+        self.days = np.asarray(days, dtype=np.int64)
+        self.symbols = list(symbols)
+        self.open = open
+        self.close = close
+        self.volume = volume
+        self.column: Dict[str, int] = {s: j for j, s in enumerate(self.symbols)}
+        self._marks = None
+
+    @classmethod
+    def from_store(cls, store: BarStore, symbols: List[str], start_day: int, end_day: int) -> "PriceMatrix":
+        arrays = {}
+        for s in symbols:
+            a = np.array(store.read(s))
+            if len(a):
+                a = a[(a[:, COL["day"]] >= start_day) & (a[:, COL["day"]] <= end_day)]
+            if len(a):
+                arrays[s] = a
+        syms = sorted(arrays)
+        days = np.unique(np.concatenate([a[:, COL["day"]] for a in arrays.values()])).astype(np.int64) if arrays else np.empty(0, dtype=np.int64)
+        shape = (len(days), len(syms))
+        out = {f: np.full(shape, np.nan) for f in FIELDS}
+        for j, s in enumerate(syms):
+            a = arrays[s]
+            rows = np.searchsorted(days, a[:, COL["day"]].astype(np.int64))
+            out["open"][rows, j] = a[:, COL["o"]]
+            out["close"][rows, j] = a[:, COL["c"]]
+            out["volume"][rows, j] = a[:, COL["v"]]
+        return cls(days, syms, out["open"], out["close"], out["volume"])
+
+    def save(self, path: str) -> str:
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "days.npy"), self.days)
+        for f in FIELDS:
+            np.save(os.path.join(path, f"{f}.npy"), np.ascontiguousarray(getattr(self, f)))
+        np.save(os.path.join(path, "marks.npy"), self.marks())
+        with open(os.path.join(path, "symbols.json"), "w", encoding="utf-8") as fh:
+            json.dump(self.symbols, fh)
+        return path
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "PriceMatrix":
+        mode = "r" if mmap else None
+        with open(os.path.join(path, "symbols.json"), "r", encoding="utf-8") as fh:
+            symbols = json.load(fh)
+        fields = {f: np.load(os.path.join(path, f"{f}.npy"), mmap_mode=mode) for f in FIELDS}
+        m = cls(np.load(os.path.join(path, "days.npy")), symbols, fields["open"], fields["close"], fields["volume"])
+        marks = os.path.join(path, "marks.npy")
+        if os.path.exists(marks):
+            m._marks = np.load(marks, mmap_mode=mode)
+        return m
+
+    def span(self, start_day: int, end_day: int) -> Tuple[int, int]:
+        return int(np.searchsorted(self.days, start_day, side="left")), int(np.searchsorted(self.days, end_day, side="right"))
+
+    def marks(self) -> np.ndarray:
+        # Close carried forward over missing sessions, used to value holdings.
+        if self._marks is None:
+            c = np.where(self.close > 0, self.close, np.nan)
+            idx = np.where(~np.isnan(c), np.arange(len(c))[:, None], 0)
+            np.maximum.accumulate(idx, axis=0, out=idx)
+            marks = c[idx, np.arange(c.shape[1])]
+            self._marks = np.nan_to_num(marks, nan=0.0)
+        return self._marks
+
+    def window(self, i: int, days: int) -> Tuple[np.ndarray, np.ndarray]:
+        lo = max(0, i - days + 1)
+        return self.close[lo:i + 1], self.volume[lo:i + 1]
@@ -0,0 +1,82 @@
+import pandas as pd
+
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+from .alpaca_service import get_account, list_positions
+from .equity_store import EquityHistory, load_equity_history
+
+
+@dataclass(frozen=True)
+class ReportContext:
+    # Everything the report stages read, fetched once up front.
+    equity: float
+    cash: float
+    positions: Tuple
+    positions_df: pd.DataFrame
+    history: EquityHistory
+    sectors: Mapping[str, str]
+    intraday_pl: float
+    top_performer: Optional[Tuple[str, float]]
+    worst_performer: Optional[Tuple[str, float]]
+
+    @property
+    def inception_equity(self) -> float:
+        return self.history.first()
+
+    @property
+    def total_pl(self) -> float:
+        return self.equity - self.inception_equity
+
+
+def _intraday_unrealized_pl(positions) -> float:
+    try:
+        total = 0.0
+        for p in positions:
+            val = getattr(p, "unrealized_intraday_pl", None)
+            if val is not None:
+                total += float(val)
+        return total
+    except Exception:
+        return 0.0
+
+
+def _top_and_worst_today(positions):
+    try:
+        items = []
+        for p in positions:
+            sym = getattr(p, "symbol", "")
+            pc = getattr(p, "unrealized_intraday_plpc", None)
+            try:
+                pct = float(pc) if pc is not None else 0.0
+            except Exception:
+                pct = 0.0
+            items.append((sym, pct))
+        if not items:
+            return None, None
+        top = max(items, key=lambda x: x[1])
+        worst = min(items, key=lambda x: x[1])
+        return top, worst
+    except Exception:
+        return None, None
+
+
+def build_report_context(alpaca, positions_df: pd.DataFrame, settings: dict) -> ReportContext:
+    acct = get_account(alpaca)
+    try:
+        positions = tuple(list_positions(alpaca))
+    except Exception:
+        positions = ()
+    top, worst = _top_and_worst_today(positions)
+    return ReportContext(
+        equity=float(acct.equity),
+        cash=float(acct.cash),
+        positions=positions,
+        positions_df=positions_df,
+        history=load_equity_history(settings["portfolio_csv"]),
+        # Alpaca has no sector data; sector alerts only fire for tagged holdings.
+        sectors=MappingProxyType({}),
+        intraday_pl=_intraday_unrealized_pl(positions),
+        top_performer=top,
+        worst_performer=worst
+    )
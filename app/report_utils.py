@@ -1,82 +1,69 @@
 import os
 import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.ticker import FuncFormatter
 from datetime import datetime, timezone
+from . import metrics
+from .charts import render_charts
+from .instrumentation import timed, record_bytes, file_size
+from .plotting import weekly_chart_job
+from .equity_store import EquityHistory, load_equity_history
 
 
 def load_inception_equity(portfolio_csv: str) -> float:
-    if not os.path.exists(portfolio_csv):
-        return 0.0
-    df = pd.read_csv(portfolio_csv)
-    df = df[df["Ticker"] == "TOTAL"].copy()
-    if df.empty:
-        return 0.0
-    try:
-        if "Date" in df.columns:
-            df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-            df = df.sort_values("Date")
-        return float(df["Total Equity"].iloc[0])
-    except Exception:
-        return float(df["Total Equity"].head(1).astype(float).values[0])
-
-
-def save_equity_chart(portfolio_csv: str, plot_dir: str) -> str:
-    os.makedirs(plot_dir, exist_ok=True)
-    df = pd.read_csv(portfolio_csv)
-    df = df[df["Ticker"] == "TOTAL"].copy()
-    if df.empty:
+    return load_equity_history(portfolio_csv).first()
+
+
+@timed("report.load_equity_metrics")
+def load_equity_metrics(portfolio_csv: str, history: EquityHistory | None = None) -> dict:
+    hist = history if history is not None else load_equity_history(portfolio_csv)
+    if len(hist) < 2:
+        return {}
+    return metrics.summarize(hist.equity)
+
+
+def _stamp() -> str:
+    return datetime.now(timezone.utc).strftime('%Y%m%d')
+
+
+def equity_chart_job(hist: EquityHistory):
+    df = hist.frame()
+    return ("equity", f"equity_{_stamp()}.png", df["Date"].to_numpy(), df["Total Equity"].to_numpy())
+
+
+def pnl_chart_job(hist: EquityHistory):
+    df = hist.frame()
+    return ("pnl", f"pnl_{_stamp()}.png", df["Date"].to_numpy(), (df["Total Equity"] - hist.first()).to_numpy())
+
+
+@timed("report.save_equity_chart")
+def save_equity_chart(portfolio_csv: str, plot_dir: str, history: EquityHistory | None = None) -> str:
+    hist = history if history is not None else load_equity_history(portfolio_csv)
+    if hist.empty:
         return ""
-    if "Date" in df.columns:
-        df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-        df = df.sort_values("Date")
-        x = df["Date"]
-    else:
-        x = range(len(df))
-    p = os.path.join(plot_dir, f"equity_{datetime.now(timezone.utc).strftime('%Y%m%d')}.png")
-    plt.figure(figsize=(7.5, 3.6))
-    plt.plot(x, df["Total Equity"], marker="o")
-    ax = plt.gca()
-    ax.set_title("Portfolio Equity")
-    ax.set_xlabel("Date")
-    ax.set_ylabel("USD")
-    ax.yaxis.set_major_formatter(FuncFormatter(lambda y, _: f"${y:,.0f}"))
-    ax.grid(True, axis="y", alpha=0.25)
-    plt.tight_layout()
-    plt.savefig(p, dpi=160)
-    plt.close()
-    return p
-
-
-def save_pnl_chart(portfolio_csv: str, plot_dir: str) -> str:
-    os.makedirs(plot_dir, exist_ok=True)
-    df = pd.read_csv(portfolio_csv)
-    df = df[df["Ticker"] == "TOTAL"].copy()
-    if df.empty:
+    job = equity_chart_job(hist)
+    return render_charts(plot_dir, [job])[job[1]]
+
+
+@timed("report.save_pnl_chart")
+def save_pnl_chart(portfolio_csv: str, plot_dir: str, history: EquityHistory | None = None) -> str:
+    hist = history if history is not None else load_equity_history(portfolio_csv)
+    if hist.empty:
         return ""
-    if "Date" in df.columns:
-        df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-        df = df.sort_values("Date")
-        x = df["Date"]
-    else:
-        x = range(len(df))
-    start_eq = float(df["Total Equity"].iloc[0])
-    pnl = df["Total Equity"].astype(float) - start_eq
-    p = os.path.join(plot_dir, f"pnl_{datetime.now(timezone.utc).strftime('%Y%m%d')}.png")
-    plt.figure(figsize=(7.5, 2.6))
-    plt.plot(x, pnl, marker="o")
-    ax = plt.gca()
-    ax.set_title("Cumulative P/L")
-    ax.set_xlabel("Date")
-    ax.set_ylabel("USD")
-    ax.yaxis.set_major_formatter(FuncFormatter(lambda y, _: f"${y:,.0f}"))
-    ax.grid(True, axis="y", alpha=0.25)
-    plt.tight_layout()
-    plt.savefig(p, dpi=160)
-    plt.close()
-    return p
+    job = pnl_chart_job(hist)
+    return render_charts(plot_dir, [job])[job[1]]
 
 
+@timed("report.render_charts")
+def render_report_charts(portfolio_csv: str, plot_dir: str, history: EquityHistory | None = None) -> dict:
+    # Equity, P/L and weekly charts in one batch; {"equity": path, ...}, "" when there is no history.
+    hist = history if history is not None else load_equity_history(portfolio_csv)
+    if hist.empty:
+        return {"equity": "", "pnl": "", "weekly": ""}
+    jobs = {"equity": equity_chart_job(hist), "pnl": pnl_chart_job(hist), "weekly": weekly_chart_job(hist)}
+    paths = render_charts(plot_dir, list(jobs.values()))
+    return {k: paths[j[1]] for k, j in jobs.items()}
+
+
+@timed("report.write_csv_snapshots")
 def write_csv_snapshots(positions_df: pd.DataFrame, trades_today: list, out_dir: str) -> list:
     os.makedirs(out_dir, exist_ok=True)
     ts = datetime.now(timezone.utc).strftime("%Y%m%d")
@@ -89,11 +76,12 @@ def write_csv_snapshots(positions_df: pd.DataFrame, trades_today: list, out_dir:
     _df = pd.DataFrame(trades_today or [])
     _df.to_csv(trades_path, index=False)
     paths.append(trades_path)
+    record_bytes("report.csv", written=sum(file_size(p) for p in paths))
     return paths
 
 
-def compute_risk_alerts(positions_df, equity_val: float, settings: dict, sectors_by_ticker: dict):
-    alerts = {"positions": [], "sectors": []}
+def compute_risk_alerts(positions_df, equity_val: float, settings: dict, sectors_by_ticker: dict, portfolio_risk=None):
+    alerts = {"positions": [], "sectors": [], "portfolio": [], "summary": ""}
     if positions_df is None or positions_df.empty or equity_val <= 0:
         return alerts
     pos_limit = float(settings.get("risk", {}).get("max_pos_pct_of_equity", 0.10))
@@ -112,7 +100,35 @@ def compute_risk_alerts(positions_df, equity_val: float, settings: dict, sectors
     for _, sector, val, _ in rows:
         sector_sum[sector] += val
     for sector, sval in sector_sum.items():
+        # Alpaca has no sector data; untagged holdings are not one sector.
+        if sector == "Unknown":
+            continue
         spct = sval / equity_val if equity_val else 0.0
         if spct > sector_limit:
             alerts["sectors"].append(f"{sector} is {spct:.1%} of equity (${sval:,.0f}) — limit {sector_limit:.0%}")
+    if portfolio_risk is not None:
+        alerts.update(_portfolio_alerts(portfolio_risk, equity_val, settings))
     return alerts
+
+
+def _portfolio_alerts(risk, equity_val: float, settings: dict) -> dict:
+    cfg = settings.get("risk_analytics", {})
+    var_limit = float(cfg.get("max_var_pct_of_equity", 0.05))
+    cluster_limit = float(cfg.get("max_cluster_pct_of_equity", 0.50))
+    conf = f"{risk.confidence:.0%}"
+    out = []
+    var_pct = risk.var / equity_val
+    if var_pct > var_limit:
+        out.append(f"1-day {conf} VaR is ${risk.var:,.0f} ({var_pct:.1%} of equity) — limit {var_limit:.0%}")
+    for names, val in zip(risk.clusters, risk.cluster_values):
+        pct = val / equity_val
+        if len(names) > 1 and pct > cluster_limit:
+            out.append(f"{', '.join(names)} move together (ρ ≥ {risk.cluster_corr:.2f}) and are {pct:.1%} of equity — limit {cluster_limit:.0%}")
+    if risk.missing:
+        out.append(f"No bar history for {', '.join(risk.missing)}; excluded from VaR")
+    summary = (
+        f"1-day {conf} VaR ${risk.hist_var:,.0f} hist / ${risk.param_var:,.0f} normal • "
+        f"CVaR ${risk.hist_cvar:,.0f} / ${risk.param_cvar:,.0f} • "
+        f"{risk.effective_bets:.1f} effective bets across {len(risk.symbols)} names ({risk.observations}d)"
+    )
+    return {"portfolio": out, "summary": summary}
@@ -11,6 +11,7 @@ from email.mime.image import MIMEImage
 from email.mime.base import MIMEBase
 from email.mime.multipart import MIMEMultipart
 from email import encoders
+from .instrumentation import timed, record_bytes
 
 
 def _md_light_to_html(text: str) -> str:
@@ -100,7 +101,9 @@ def build_report_html(
     risk_alerts: dict | None = None,
     news_by_ticker: dict | None = None,
     top_performer: Optional[Tuple[str, float]] = None,
-    worst_performer: Optional[Tuple[str, float]] = None
+    worst_performer: Optional[Tuple[str, float]] = None,
+    performance: dict | None = None,
+    run_metrics: dict | None = None
 ) -> str:
     def render_alert_list(items):
         items = items or []
@@ -169,10 +172,13 @@ def build_report_html(
 
     pos_alerts_html = render_alert_list((risk_alerts or {}).get("positions"))
     sec_alerts_html = render_alert_list((risk_alerts or {}).get("sectors"))
+    port_alerts_html = render_alert_list((risk_alerts or {}).get("portfolio"))
+    risk_summary = (risk_alerts or {}).get("summary") or ""
     has_pos = bool((risk_alerts or {}).get("positions"))
     has_sec = bool((risk_alerts or {}).get("sectors"))
+    has_port = bool((risk_alerts or {}).get("portfolio"))
     alerts_html = ""
-    if has_pos or has_sec:
+    if has_pos or has_sec or has_port or risk_summary:
         alerts_html = f"""
           <h2 style="margin:18px 0 8px 0;font-size:16px;">Risk Alerts</h2>
           <div style="display:flex;gap:18px;flex-wrap:wrap;margin-bottom:12px">
@@ -184,7 +190,12 @@ def build_report_html(
               <div style="font-size:12px;color:#64748b;margin-bottom:6px">Sectors</div>
               <ul style="margin:0 0 0 18px;padding:0;font-size:14px;line-height:1.6">{sec_alerts_html}</ul>
             </div>
+            <div style="flex:1;min-width:240px">
+              <div style="font-size:12px;color:#64748b;margin-bottom:6px">Portfolio</div>
+              <ul style="margin:0 0 0 18px;padding:0;font-size:14px;line-height:1.6">{port_alerts_html}</ul>
+            </div>
           </div>
+          <div style="font-size:12px;color:#64748b;margin-bottom:12px">{escape(risk_summary)}</div>
         """
 
     top_html = ""
@@ -196,6 +207,33 @@ def build_report_html(
         sym, pct = worst_performer
         worst_html = f"<div style='font-size:14px'><strong>Worst Performer:</strong> {escape(str(sym))} <span style='color:#dc2626'>{pct:.2%}</span></div>"
 
+    perf_html = ""
+    if performance:
+        perf_html = (
+            "<div style='font-size:12px;color:#64748b;margin:-6px 0 14px 0'>"
+            f"Sharpe {performance.get('sharpe', 0.0):.2f} · "
+            f"Sortino {performance.get('sortino', 0.0):.2f} · "
+            f"Max DD {performance.get('max_drawdown', 0.0):.1%} · "
+            f"Hit rate {performance.get('hit_rate', 0.0):.0%}"
+            "</div>"
+        )
+
+    metrics_html = ""
+    if run_metrics:
+        parts = []
+        for group, m in run_metrics.items():
+            part = f"{escape(group)} {m.get('calls', 0)} calls, {m.get('seconds', 0.0):.1f}s"
+            if m.get("bytes"):
+                part += f", {m['bytes'] / 1024:,.0f} KB"
+            if m.get("tokens"):
+                part += f", {m['tokens']:,} tokens"
+            parts.append(part)
+        metrics_html = (
+            "<div style='font-size:12px;color:#64748b;margin:-6px 0 14px 0'>"
+            f"Run: {' · '.join(parts)}"
+            "</div>"
+        )
+
     html = f"""
 <!doctype html>
 <html>
@@ -254,6 +292,8 @@ def build_report_html(
               </table>
 
               {f"<div style='font-size:12px;color:#64748b;margin:-6px 0 14px 0'>Signals: {escape(vote_summary)}</div>" if vote_summary else ""}
+              {perf_html}
+              {metrics_html}
 
               <div style="gap:18px;flex-wrap:wrap;margin-bottom:6px;flex-direction:column">
                 <div style="flex:1;min-width:100%">{top_html}</div>
@@ -329,6 +369,7 @@ def _bool_env(key: str, default: bool) -> bool:
     return str(v).strip().lower() in {"1", "true", "yes", "on"}
 
 
+@timed("email.send")
 def send_email_html(
     subject: str,
     html: str,
@@ -381,12 +422,13 @@ def send_email_html(
             part.add_header("Content-Disposition", f'attachment; filename="{os.path.basename(path)}"')
             msg.attach(part)
 
+    payload = msg.as_string()
     if use_ssl:
         ctx = ssl.create_default_context()
         with smtplib.SMTP_SSL(host, port, context=ctx) as server:
             if username and password:
                 server.login(username, password)
-            server.sendmail(sender, to, msg.as_string())
+            server.sendmail(sender, to, payload)
     else:
         with smtplib.SMTP(host, port) as server:
             if use_tls:
@@ -394,7 +436,8 @@ def send_email_html(
                 server.starttls(context=ctx)
             if username and password:
                 server.login(username, password)
-            server.sendmail(sender, to, msg.as_string())
+            server.sendmail(sender, to, payload)
+    record_bytes("email", written=len(payload))
 
 
 def dispatch_report(report_text: str, settings: dict):
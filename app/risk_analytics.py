@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import List, Optional, Tuple
+from .bar_store import BarStore, today_number
+from .price_matrix import PriceMatrix
+
+
+# Portfolio-level risk from the daily bars of current holdings: 1-day historical
+# and parametric (normal) VaR/CVaR in dollars, the correlation matrix, and
+# clusters of names that move together (single linkage above a correlation
+# threshold) with a Herfindahl concentration score over those clusters.
+
+
+@dataclass(frozen=True)
+class PortfolioRisk:
+    symbols: Tuple[str, ...]
+    values: np.ndarray
+    confidence: float
+    observations: int
+    hist_var: float
+    hist_cvar: float
+    param_var: float
+    param_cvar: float
+    volatility: float
+    correlation: np.ndarray
+    cluster_corr: float
+    clusters: Tuple[Tuple[str, ...], ...]
+    cluster_values: Tuple[float, ...]
+    concentration: float
+    missing: Tuple[str, ...] = ()
+
+    @property
+    def var(self) -> float:
+        return max(self.hist_var, self.param_var)
+
+    @property
+    def effective_bets(self) -> float:
+        return 1.0 / self.concentration if self.concentration > 0 else 0.0
+
+
+def holding_returns(store: BarStore, symbols: List[str], lookback: int) -> Tuple[List[str], np.ndarray]:
+    # Daily close-to-close returns, (days x symbols); sessions a name did not
+    # trade (or before it listed) count as a zero return.
+    end = today_number() - 1
+    m = PriceMatrix.from_store(store, symbols, end - (lookback * 7 // 5 + 10), end)
+    marks = m.marks()[-(lookback + 1):]
+    if len(marks) < 2:
+        return m.symbols, np.zeros((0, len(m.symbols)))
+    prev = marks[:-1]
+    r = np.divide(marks[1:], prev, out=np.ones_like(prev), where=prev > 0) - 1.0
+    return m.symbols, r
+
+
+def correlation(cov: np.ndarray) -> np.ndarray:
+    sd = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+    denom = np.outer(sd, sd)
+    corr = np.divide(cov, denom, out=np.zeros_like(cov), where=denom > 0)
+    np.fill_diagonal(corr, 1.0)
+    return np.clip(corr, -1.0, 1.0)
+
+
+def cluster_labels(corr: np.ndarray, threshold: float) -> np.ndarray:
+    # Connected components of the "corr >= threshold" graph via repeated
+    # squaring of the reachability matrix; each label is the component's lowest index.
+    n = len(corr)
+    if not n:
+        return np.zeros(0, dtype=np.int64)
+    reach = (corr >= threshold) | np.eye(n, dtype=bool)
+    while True:
+        nxt = (reach.astype(np.int32) @ reach.astype(np.int32)) > 0
+        if (nxt == reach).all():
+            break
+        reach = nxt
+    return np.argmax(reach, axis=1)
+
+
+def portfolio_risk(symbols: List[str], returns: np.ndarray, values, confidence: float = 0.95, cluster_corr: float = 0.7, missing: Tuple[str, ...] = ()) -> PortfolioRisk:
+    # returns: (days x names) simple returns; values: signed dollar exposure per name.
+    v = np.asarray(values, dtype=np.float64)
+    r = np.asarray(returns, dtype=np.float64).reshape(-1, len(v))
+    t = len(r)
+    tail = 1.0 - confidence
+
+    pnl = r @ v
+    if t:
+        cut = float(np.quantile(pnl, tail))
+        hist_var = max(-cut, 0.0)
+        hist_cvar = max(-float(pnl[pnl <= cut].mean()), 0.0)
+    else:
+        hist_var = hist_cvar = 0.0
+
+    cov = np.atleast_2d(np.cov(r, rowvar=False)) if t > 1 else np.zeros((len(v), len(v)))
+    mu = float(r.mean(axis=0) @ v) if t else 0.0
+    sigma = float(np.sqrt(max(v @ cov @ v, 0.0)))
+    z = NormalDist().inv_cdf(tail)
+    param_var = max(-(mu + z * sigma), 0.0)
+    param_cvar = max(-mu + sigma * NormalDist().pdf(z) / tail, 0.0)
+
+    corr = correlation(cov)
+    labels = cluster_labels(corr, cluster_corr)
+    exposure = np.abs(v)
+    per_label = np.bincount(labels, weights=exposure, minlength=len(v)) if len(v) else np.zeros(0)
+    order = [k for k in np.argsort(-per_label, kind="mergesort") if per_label[k] > 0]
+    clusters = tuple(tuple(symbols[j] for j in np.flatnonzero(labels == k)) for k in order)
+    share = per_label / exposure.sum() if exposure.sum() > 0 else per_label
+
+    return PortfolioRisk(
+        symbols=tuple(symbols),
+        values=v,
+        confidence=confidence,
+        observations=t,
+        hist_var=hist_var,
+        hist_cvar=hist_cvar,
+        param_var=param_var,
+        param_cvar=param_cvar,
+        volatility=sigma,
+        correlation=corr,
+        cluster_corr=cluster_corr,
+        clusters=clusters,
+        cluster_values=tuple(float(per_label[k]) for k in order),
+        concentration=float((share ** 2).sum()),
+        missing=tuple(missing)
+    )
+
+
+def load_portfolio_risk(alpaca, positions_df: Optional[pd.DataFrame], settings: dict) -> Optional[PortfolioRisk]:
+    cfg = settings.get("risk_analytics", {})
+    store_dir = cfg.get("bar_store_dir") or settings["universe"].get("bar_store_dir")
+    if positions_df is None or positions_df.empty or not store_dir:
+        return None
+    lookback = int(cfg.get("lookback_days", 250))
+    values = pd.to_numeric(positions_df["Total Value"], errors="coerce").fillna(0.0)
+    values = values.groupby(positions_df["Ticker"].astype(str).to_numpy(), sort=False).sum()
+    tickers = values.index.tolist()
+    store = BarStore(store_dir)
+    if alpaca is not None:
+        try:
+            end = today_number() - 1
+            store.backfill(alpaca, tickers, end - (lookback * 7 // 5 + 10), end)
+        except Exception as e:
+            print("Risk analytics bar backfill failed, using stored bars:", repr(e))
+    syms, returns = holding_returns(store, tickers, lookback)
+    if len(returns) < int(cfg.get("min_observations", 20)):
+        return None
+    return portfolio_risk(
+        syms, returns, values.reindex(syms).to_numpy(),
+        confidence=float(cfg.get("confidence", 0.95)),
+        cluster_corr=float(cfg.get("cluster_corr", 0.7)),
+        missing=tuple(t for t in tickers if t not in set(syms))
+    )
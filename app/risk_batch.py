@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+from typing import Dict, List, Optional
+from .allocator import allocate_shares
+
+
+# Array versions of the risk_engine checks: every candidate is validated and
+# sized in one pass instead of per-symbol lookups against the positions frame.
+
+
+def validate_symbols(metas: Dict[str, dict], settings: dict) -> Dict[str, bool]:
+    if not metas:
+        return {}
+    m = pd.DataFrame.from_dict(metas, orient="index")
+    col = lambda c, default: m[c] if c in m.columns else pd.Series(default, index=m.index)
+    risk = settings["risk"]
+    ok = (
+        col("exchange", None).isin(settings["universe"]["exchanges"])
+        & (pd.to_numeric(col("price", 0), errors="coerce").fillna(0) >= risk["min_price"])
+        & (pd.to_numeric(col("avg_volume", 0), errors="coerce").fillna(0) >= risk["min_avg_volume"])
+        & (pd.to_numeric(col("market_cap", None), errors="coerce").fillna(-np.inf) <= risk["max_market_cap"])
+        & col("tradable", False).fillna(False).astype(bool)
+    )
+    return ok.to_dict()
+
+
+def position_lookup(positions_df: Optional[pd.DataFrame], tickers: List[str], column: str) -> np.ndarray:
+    # One reindex instead of a df[df["Ticker"] == t] scan per ticker; 0 for names not held.
+    if positions_df is None or positions_df.empty or column not in positions_df.columns:
+        return np.zeros(len(tickers))
+    s = pd.to_numeric(positions_df[column], errors="coerce")
+    s.index = positions_df["Ticker"].astype(str)
+    s = s[~s.index.duplicated()]
+    return s.reindex(list(tickers)).fillna(0.0).to_numpy(dtype=np.float64)
+
+
+def buy_budget(equity: float, cash: float, settings: dict) -> float:
+    risk = settings.get("risk", {})
+    caps = [float(settings["budget"]["max_daily_allocation_abs"]), float(cash)]
+    if "max_daily_allocation_pct" in risk:
+        caps.append(float(risk["max_daily_allocation_pct"]) * float(equity))
+    return max(min(caps), 0.0)
+
+
+def size_buys(tickers: List[str], prices, limit_prices, positions_df: Optional[pd.DataFrame], equity: float, cash: float, settings: dict, weights=None) -> np.ndarray:
+    # Final share counts for buy candidates, in priority order:
+    #  - new names only take the slots left under risk.max_symbols;
+    #  - each name is held to max_pos_pct of equity and budget.max_pos_abs
+    #    including what is already owned;
+    #  - the day's budget (daily cap, % of equity, cash) is split by weight
+    #    (even by default) and allocated in whole shares at limit prices.
+    prices = np.asarray(prices, dtype=np.float64)
+    limits = np.asarray(limit_prices, dtype=np.float64)
+    if not len(prices):
+        return np.zeros(0, dtype=np.int64)
+    risk = settings.get("risk", {})
+    held_value = position_lookup(positions_df, tickers, "Total Value")
+    held = position_lookup(positions_df, tickers, "Shares") > 0
+
+    held_count = 0
+    if positions_df is not None and not positions_df.empty and "Shares" in positions_df.columns:
+        held_count = int((pd.to_numeric(positions_df["Shares"], errors="coerce").fillna(0) > 0).sum())
+    slots = max(int(risk.get("max_symbols", len(prices) + held_count)) - held_count, 0)
+    ok = (prices > 0) & (limits > 0) & (held | (np.cumsum(~held) <= slots))
+
+    room = np.minimum(
+        float(risk.get("max_pos_pct", 1.0)) * float(equity) - held_value,
+        float(settings["budget"].get("max_pos_abs", np.inf)) - held_value,
+    )
+    safe_prices = np.where(prices > 0, prices, 1.0)
+    max_shares = np.where(ok, np.floor_divide(np.clip(room, 0.0, None), safe_prices), 0.0)
+    return allocate_shares(np.where(ok, limits, 0.0), buy_budget(equity, cash, settings), max_shares, weights)
@@ -1,5 +1,4 @@
-from typing import Dict, List
-from .alpaca_service import list_positions, submit_order
+from typing import Dict
 
 
 def breached_daily_drawdown(start_equity: float, current_equity: float, settings: dict) -> bool:
@@ -10,19 +9,10 @@ def breached_daily_drawdown(start_equity: float, current_equity: float, settings
     return loss >= limit
 
 
-def flatten_all(alpaca) -> List[Dict]:
-    res = []
-    for p in list_positions(alpaca):
-        try:
-            side = "sell" if float(p.qty) > 0 else "buy"
-            qty = abs(int(float(p.qty)))
-            if qty <= 0:
-                continue
-            o = submit_order(alpaca, symbol=p.symbol, qty=qty, side=side, type="market", time_in_force="day")
-            res.append({"symbol": p.symbol, "qty": qty, "side": side, "status": "submitted"})
-        except Exception as e:
-            res.append({"symbol": p.symbol, "error": str(e)})
-    return res
+def flatten_all(alpaca, settings: dict = None, positions=None) -> Dict:
+    # See app/flatten.py: concurrent liquidation, tracked to fills, with retries.
+    from .flatten import flatten
+    return flatten(alpaca, settings or {}, positions)
 
 
 def make_bracket_kwargs(price: float, settings: dict) -> Dict:
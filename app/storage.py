@@ -1,10 +1,13 @@
 import os
+import csv
 import json
 import tempfile
 import pandas as pd
 
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timezone
+from .equity_store import load_equity_history, record_total
+from .instrumentation import timed, record_bytes, file_size
 
 
 COLUMNS = ["Timestamp","Date","Ticker","Shares","Cost Basis","Stop Loss","Current Price","Total Value","PnL","Action","Cash Balance","Total Equity"]
@@ -22,36 +25,94 @@ def _atomic_write_csv(df: pd.DataFrame, path: str) -> None:
     os.replace(tmp, path)
 
 
-def save_trade_log(path: str, log: Dict[str, Any]) -> None:
+def _repair_tail(path: str, chunk: int = 4096) -> None:
+    # Rows are always written with a trailing newline, so a last line without
+    # one is a crash mid-append: drop it so the next row starts on a fresh line.
+    # Only the tail is read, in chunks backwards from the end.
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b"\n":
+            return
+        pos = end
+        while pos > 0:
+            start = max(pos - chunk, 0)
+            f.seek(start)
+            i = f.read(pos - start).rfind(b"\n")
+            if i >= 0:
+                f.truncate(start + i + 1)
+                return
+            pos = start
+        # A lone header without its newline: terminate it.
+        f.seek(end)
+        f.write(b"\n")
+
+
+def _read_header(path: str) -> List[str]:
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), [])
+
+
+@timed("storage.compact_csv")
+def compact_csv(path: str, columns: Optional[List[str]] = None) -> List[str]:
+    # Full rewrite: widens or reorders the header and normalizes every row to it.
+    size_before = file_size(path)
     if os.path.exists(path) and os.path.getsize(path) > 0:
-        df = pd.read_csv(path)
+        _repair_tail(path)
+        df = pd.read_csv(path) if os.path.getsize(path) > 0 else pd.DataFrame()
     else:
         df = pd.DataFrame()
-    df = pd.concat([df, pd.DataFrame([log])], ignore_index=True)
+    for c in columns or []:
+        if c not in df.columns:
+            df[c] = ""
+    if columns:
+        df = df[columns]
     _atomic_write_csv(df, path)
+    record_bytes("storage.csv", read=size_before, written=file_size(path))
+    return list(df.columns)
+
+
+@timed("storage.append_csv_row")
+def append_csv_row(path: str, row: Dict[str, Any], columns: Optional[List[str]] = None) -> None:
+    # Appends one row without rereading the file. The file is only rewritten
+    # (compacted) when the row needs columns the header does not have yet.
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        _repair_tail(path)
+    fresh = not os.path.exists(path) or os.path.getsize(path) == 0
+    if fresh:
+        header = list(columns or row.keys())
+    else:
+        header = _read_header(path)
+        wanted = list(columns) if columns else header + [k for k in row if k not in header]
+        if wanted != header:
+            header = compact_csv(path, wanted)
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        start = f.tell()
+        w = csv.writer(f, lineterminator="\n")
+        if fresh:
+            w.writerow(header)
+        w.writerow(["" if row.get(c) is None else row.get(c) for c in header])
+        f.flush()
+        os.fsync(f.fileno())
+        record_bytes("storage.csv", written=f.tell() - start)
+
+
+def save_trade_log(path: str, log: Dict[str, Any]) -> None:
+    append_csv_row(path, log)
 
 
+@timed("storage.load_latest_total_equity")
 def load_latest_total_equity(path: str) -> float:
-    if not os.path.exists(path) or os.path.getsize(path) == 0:
-        return 0.0
-    df = pd.read_csv(path)
-    if "Ticker" not in df.columns or df.empty:
-        return 0.0
-    df = df[df["Ticker"] == "TOTAL"]
-    if df.empty:
-        return 0.0
-    return float(df["Total Equity"].iloc[-1])
+    return load_equity_history(path).latest()
 
 
+@timed("storage.append_total_row")
 def append_total_row(path: str, row: Dict[str, Any]) -> None:
-    if os.path.exists(path) and os.path.getsize(path) > 0:
-        df = pd.read_csv(path)
-        missing = [c for c in COLUMNS if c not in df.columns]
-        for c in missing:
-            df[c] = ""
-        df = df[COLUMNS]
-        df.loc[len(df)] = [row.get(c, "") for c in COLUMNS]
-    else:
-        df = pd.DataFrame(columns=COLUMNS)
-        df.loc[0] = [row.get(c, "") for c in COLUMNS]
-    _atomic_write_csv(df, path)
\ No newline at end of file
+    size_before = os.path.getsize(path) if os.path.exists(path) else 0
+    append_csv_row(path, row, COLUMNS)
+    record_total(path, row, size_before)
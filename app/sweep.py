@@ -0,0 +1,121 @@
+import os
+import copy
+import json
+import random
+import argparse
+import itertools
+import tempfile
+import pandas as pd
+
+from typing import Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from .config_loader import load_settings
+from .alpaca_service import make_alpaca
+from .backtester import load_backtest_matrix, run_backtest, uses_key
+from .price_matrix import PriceMatrix
+
+
+RESULT_COLUMNS = ["final_equity", "total_return", "sharpe", "sortino", "max_drawdown", "drawdown_duration", "cagr", "calmar", "hit_rate", "turnover"]
+
+# Set once per worker process by _init_worker; every run in that worker reads
+# the same memory-mapped matrix.
+_matrix: Optional[PriceMatrix] = None
+
+
+def set_key(settings: dict, dotted: str, value) -> None:
+    d = settings
+    parts = dotted.split(".")
+    for p in parts[:-1]:
+        d = d.setdefault(p, {})
+    d[parts[-1]] = value
+
+
+def grid_points(grid: Dict[str, List]) -> List[Dict]:
+    keys = list(grid)
+    return [dict(zip(keys, combo)) for combo in itertools.product(*(grid[k] for k in keys))]
+
+
+def random_points(space: Dict[str, list], samples: int, seed: int = 0) -> List[Dict]:
+    # A list is sampled as choices, a two-element [lo, hi] of floats as a uniform range.
+    rnd = random.Random(seed)
+    points = []
+    for _ in range(samples):
+        p = {}
+        for k, v in space.items():
+            if len(v) == 2 and all(isinstance(x, float) for x in v):
+                p[k] = rnd.uniform(v[0], v[1])
+            else:
+                p[k] = rnd.choice(v)
+        points.append(p)
+    return points
+
+
+def _init_worker(matrix_dir: str) -> None:
+    global _matrix
+    _matrix = PriceMatrix.load(matrix_dir, mmap=True)
+
+
+def _run_one(job) -> Dict:
+    start_date, end_date, settings, params = job
+    s = copy.deepcopy(settings)
+    for k, v in params.items():
+        set_key(s, k, v)
+    row = dict(params)
+    try:
+        r = run_backtest(start_date, end_date, s, matrix=_matrix)
+        row.update({c: r.get(c) for c in RESULT_COLUMNS})
+    except Exception as e:
+        row["error"] = repr(e)
+    return row
+
+
+def run_sweep(start_date: str, end_date: str, settings: dict, grid: Optional[Dict[str, List]] = None, space: Optional[Dict[str, list]] = None, samples: int = 20, seed: int = 0, workers: Optional[int] = None, offline: bool = False) -> pd.DataFrame:
+    if grid:
+        points = grid_points(grid)
+    elif space:
+        points = random_points(space, samples, seed)
+    else:
+        raise ValueError("Either a grid or a random search space is required")
+    ignored = sorted({k for p in points for k in p if not uses_key(k)})
+    if ignored:
+        raise ValueError(f"The backtester does not read {', '.join(ignored)}; sweeping it would not change the result")
+    alpaca = None if offline else make_alpaca(settings.get("api_cache"))
+    matrix = load_backtest_matrix(start_date, end_date, settings, alpaca)
+    jobs = [(start_date, end_date, settings, p) for p in points]
+    with tempfile.TemporaryDirectory(prefix="sweep_") as tmp:
+        matrix.save(tmp)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tmp,)) as ex:
+            rows = list(ex.map(_run_one, jobs))
+    df = pd.DataFrame(rows)
+    if "sharpe" in df.columns:
+        df = df.sort_values("sharpe", ascending=False, kind="mergesort", na_position="last")
+    return df.reset_index(drop=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Backtest parameter sweep")
+    ap.add_argument("--start", required=True)
+    ap.add_argument("--end", required=True)
+    ap.add_argument("--grid", help='JSON object of dotted settings keys to value lists, e.g. {"brackets.stop_loss_pct": [0.03, 0.05, 0.08]}')
+    ap.add_argument("--space", help="JSON object for random search; [lo, hi] floats are sampled uniformly")
+    ap.add_argument("--samples", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--offline", action="store_true")
+    ap.add_argument("--out", help="CSV path for the comparison table")
+    args = ap.parse_args()
+
+    settings = load_settings(os.path.join(os.path.dirname(__file__), "config", "settings.json"))
+    df = run_sweep(
+        args.start, args.end, settings,
+        grid=json.loads(args.grid) if args.grid else None,
+        space=json.loads(args.space) if args.space else None,
+        samples=args.samples, seed=args.seed, workers=args.workers, offline=args.offline
+    )
+    if args.out:
+        df.to_csv(args.out, index=False)
+    print(df.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 import time
+import pandas as pd
 
 from typing import List
 from alpaca_trade_api.rest import TimeFrame
-from .alpaca_service import get_bars_multi
+from .alpaca_service import get_bars_since
+from .bar_store import BarStore, day_string, today_number
+from .workers import run_batches
+from .universe_scoring import bars_frame, store_frame, rank_universe
 
 
 def _chunks(seq, n):
@@ -12,46 +16,36 @@ def _chunks(seq, n):
 
 def auto_universe(alpaca, settings: dict) -> List[str]:
     exchanges = set(settings["universe"]["exchanges"])
-    min_price = float(settings["universe"]["min_price"])
-    max_price = float(settings["universe"]["max_price"])
-    min_avg_volume = float(settings["universe"]["min_avg_volume"])
-    max_size = int(settings["universe"]["max_size"])
     scan_cap = int(settings["universe"].get("max_scan", 1200))
     days = int(settings["universe"].get("avg_volume_days", 20))
     chunk_size = int(settings["universe"].get("batch_size", 200))
     timeout_seconds = int(settings["universe"].get("timeout_seconds", 20))
+    store_dir = settings["universe"].get("bar_store_dir")
+    concurrency = int(settings["universe"].get("concurrency", 4))
+    per_minute = float(settings["universe"].get("requests_per_minute", 180))
 
     assets = alpaca.list_assets(status="active", asset_class="us_equity")
-    syms = [a.symbol for a in assets if a.exchange in exchanges and a.tradable][:scan_cap]
+    syms = [a.symbol for a in assets if a.exchange in exchanges and a.tradable]
     start_t = time.monotonic()
 
-    scored = []
-    for batch in _chunks(syms, chunk_size):
-        if time.monotonic() - start_t > timeout_seconds:
-            break
-        bars = get_bars_multi(alpaca, batch, TimeFrame.Day, limit=days)
-        by_sym = {}
-        for b in bars:
-            by_sym.setdefault(b.S, []).append(b)
-
-        for s in batch:
-            sb = by_sym.get(s, [])
-            if not sb:
-                continue
-            closes = [float(x.c) for x in sb if float(x.c) > 0]
-            vols = [float(x.v) for x in sb if float(x.v) > 0]
-            if not closes or not vols:
-                continue
-            last_px = closes[-1]
-            avgv = sum(vols)/len(vols)
-            if last_px < min_price or last_px > max_price:
-                continue
-            if avgv < min_avg_volume:
-                continue
-            scored.append((s, avgv))
-
-        if len(scored) >= max_size*2:
-            break
-
-    scored.sort(key=lambda x: x[1], reverse=True)
-    return [s for s,_ in scored[:max_size]]
\ No newline at end of file
+    if store_dir:
+        # Scoring reads local bars, so the whole exchange list is cheap to scan;
+        # only sessions newer than the stored ones are requested from Alpaca.
+        store = BarStore(store_dir)
+        store.refresh(alpaca, syms, days, chunk_size, deadline=start_t + timeout_seconds, concurrency=concurrency, per_minute=per_minute)
+        return rank_universe(store_frame(store, syms, days), settings)
+
+    if scan_cap > 0:
+        syms = syms[:scan_cap]
+    # Multi-symbol bar requests apply `limit` to the whole response, so ask for a
+    # date window instead and let the scorer keep the last `days` bars per symbol.
+    start = day_string(today_number() - (days * 7 // 5 + 10))
+    batches = list(_chunks(syms, chunk_size))
+    results = run_batches(
+        lambda batch: bars_frame(get_bars_since(alpaca, batch, TimeFrame.Day, start)),
+        batches, concurrency=concurrency, per_minute=per_minute, deadline=start_t + timeout_seconds
+    )
+    frames = [f for f in results if f is not None and not f.empty]
+    if not frames:
+        return []
+    return rank_universe(pd.concat(frames, ignore_index=True), settings)
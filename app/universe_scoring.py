@@ -0,0 +1,103 @@
+import warnings
+import numpy as np
+import pandas as pd
+
+from typing import Dict, List
+from .bar_store import BarStore, COL
+
+
+FACTORS = ("avg_volume", "dollar_volume", "volatility", "momentum")
+FRAME_COLUMNS = ["symbol", "close", "volume"]
+
+
+def bars_frame(bars) -> pd.DataFrame:
+    df = getattr(bars, "df", None)
+    if df is not None:
+        if df.empty:
+            return pd.DataFrame(columns=FRAME_COLUMNS)
+        return df.reset_index()[FRAME_COLUMNS]
+    return pd.DataFrame({
+        "symbol": [b.S for b in bars],
+        "close": np.fromiter((float(b.c) for b in bars), dtype=np.float64, count=len(bars)),
+        "volume": np.fromiter((float(b.v) for b in bars), dtype=np.float64, count=len(bars)),
+    })
+
+
+def store_frame(store: BarStore, symbols: List[str], days: int) -> pd.DataFrame:
+    arrays = [store.read(s, days) for s in symbols]
+    lengths = np.fromiter((len(a) for a in arrays), dtype=np.int64, count=len(arrays))
+    if not lengths.sum():
+        return pd.DataFrame(columns=FRAME_COLUMNS)
+    data = np.concatenate([a for a in arrays if len(a)])
+    return pd.DataFrame({
+        "symbol": np.repeat(np.asarray(symbols, dtype=object), lengths),
+        "close": data[:, COL["c"]],
+        "volume": data[:, COL["v"]],
+    })
+
+
+def factor_table(frame: pd.DataFrame, days: int) -> pd.DataFrame:
+    # One row per symbol over its last `days` bars; non-positive prints are ignored
+    # like missing data, matching the per-bar filters of the original scan.
+    frame = frame.groupby("symbol", sort=False).tail(days)
+    close = frame["close"].astype(np.float64).where(lambda x: x > 0)
+    volume = frame["volume"].astype(np.float64).where(lambda x: x > 0)
+    g = pd.DataFrame({"close": close, "volume": volume, "dv": close * volume, "ret": np.log(close)}).groupby(frame["symbol"], sort=True)
+    last = g["close"].last()
+    log_ret = g["ret"].diff()
+    return pd.DataFrame({
+        "last_price": last,
+        "avg_volume": g["volume"].mean(),
+        "dollar_volume": g["dv"].mean(),
+        "volatility": log_ret.groupby(frame["symbol"]).std(),
+        "momentum": last / g["close"].first() - 1.0,
+    })
+
+
+def window_factor_table(symbols: List[str], close: np.ndarray, volume: np.ndarray) -> pd.DataFrame:
+    # Same factors as factor_table for an aligned (days x symbols) window, e.g. a
+    # slice of the backtest price matrix; missing sessions are NaN.
+    close = np.where(close > 0, close, np.nan)
+    volume = np.where(volume > 0, volume, np.nan)
+    valid = ~np.isnan(close)
+    cols = np.arange(close.shape[1])
+    has = valid.any(axis=0)
+    last = np.where(has, close[close.shape[0] - 1 - np.argmax(valid[::-1], axis=0), cols], np.nan)
+    first = np.where(has, close[np.argmax(valid, axis=0), cols], np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        avg_volume = np.nanmean(volume, axis=0)
+        dollar_volume = np.nanmean(close * volume, axis=0)
+        volatility = np.nanstd(np.diff(np.log(close), axis=0), axis=0, ddof=1) if close.shape[0] > 1 else np.full(close.shape[1], np.nan)
+    return pd.DataFrame({
+        "last_price": last,
+        "avg_volume": avg_volume,
+        "dollar_volume": dollar_volume,
+        "volatility": volatility,
+        "momentum": last / first - 1.0,
+    }, index=pd.Index(symbols, name="symbol")).sort_index(kind="mergesort")
+
+
+def rank_factors(t: pd.DataFrame, settings: dict) -> List[str]:
+    u = settings["universe"]
+    weights: Dict[str, float] = u.get("rank_weights") or {"avg_volume": 1.0}
+    unknown = set(weights) - set(FACTORS)
+    if unknown:
+        raise ValueError(f"Unknown universe rank factors: {sorted(unknown)}")
+    ok = (
+        t["last_price"].notna() & t["avg_volume"].notna()
+        & (t["last_price"] >= float(u["min_price"]))
+        & (t["last_price"] <= float(u["max_price"]))
+        & (t["avg_volume"] >= float(u["min_avg_volume"]))
+    )
+    t = t[ok]
+    # Factors are combined as weighted percentile ranks; a negative weight prefers low values.
+    score = sum(float(w) * t[f].rank(pct=True).fillna(0.0) for f, w in weights.items())
+    t = t.assign(score=score).sort_values(["score", "avg_volume"], ascending=False, kind="mergesort")
+    return t.index[:int(u["max_size"])].tolist()
+
+
+def rank_universe(frame: pd.DataFrame, settings: dict) -> List[str]:
+    if frame.empty:
+        return []
+    return rank_factors(factor_table(frame, int(settings["universe"].get("avg_volume_days", 20))), settings)
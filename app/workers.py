@@ -0,0 +1,58 @@
+import time
+import threading
+
+from typing import Callable, List, Optional, Sequence
+from concurrent.futures import ThreadPoolExecutor
+
+
+class RateLimiter:
+    def __init__(self, per_minute: float = 0):
+        self.interval = 60.0 / float(per_minute) if per_minute and per_minute > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+def _rate_limited(e: Exception) -> bool:
+    status = getattr(e, "status_code", None)
+    if status is None:
+        status = getattr(getattr(e, "response", None), "status_code", None)
+    return status == 429
+
+
+def run_batches(fn: Callable, batches: Sequence, concurrency: int = 4, per_minute: float = 0, deadline: Optional[float] = None, retries: int = 3) -> List:
+    # Results come back in batch order; batches not started before the
+    # monotonic deadline are left as None.
+    results = [None] * len(batches)
+    limiter = RateLimiter(per_minute)
+
+    def work(i):
+        for attempt in range(retries + 1):
+            if deadline is not None and time.monotonic() > deadline:
+                return
+            limiter.acquire()
+            try:
+                results[i] = fn(batches[i])
+                return
+            except Exception as e:
+                if not _rate_limited(e) or attempt == retries:
+                    raise
+                time.sleep(min(2 ** attempt, 8))
+
+    ex = ThreadPoolExecutor(max_workers=max(1, int(concurrency)))
+    try:
+        futures = [ex.submit(work, i) for i in range(len(batches))]
+        for f in futures:
+            f.result()
+    finally:
+        ex.shutdown(wait=True, cancel_futures=True)
+    return results
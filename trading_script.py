@@ -8,6 +8,7 @@ logic or behaviour.
 from pathlib import Path
 from datetime import datetime
 from alpaca import api, TimeFrame
+from app.metrics import total_sharpe_sortino
 
 import os
 import time
@@ -481,24 +482,10 @@ def daily_results(chatgpt_portfolio: pd.DataFrame, cash: float) -> None:
     final_equity = float(final_value["Total Equity"].values[0])
     equity_series = chatgpt_totals["Total Equity"].astype(float).reset_index(drop=True)
 
-    # Daily returns
-    daily_pct = equity_series.pct_change().dropna()
-
-    total_return = (equity_series.iloc[-1] - equity_series.iloc[0]) / equity_series.iloc[0]
-
     # Number of total trading days
     n_days = len(chatgpt_totals)
-    # Risk-free return over total trading period (assuming 4.5% risk-free rate)
-    rf_annual = 0.045
-    rf_period = (1 + rf_annual) ** (n_days / 252) - 1
-    # Standard deviation of daily returns
-    std_daily = daily_pct.std()
-    negative_pct = daily_pct[daily_pct < 0]
-    negative_std = negative_pct.std()
-    # Sharpe Ratio
-    sharpe_total = (total_return - rf_period) / (std_daily * np.sqrt(n_days))
-    # Sortino Ratio
-    sortino_total = (total_return - rf_period) / (negative_std * np.sqrt(n_days))
+    # Whole-period Sharpe/Sortino (assuming 4.5% risk-free rate)
+    sharpe_total, sortino_total = total_sharpe_sortino(equity_series.to_numpy(), rf_annual=0.045)
 
     # Output
     print(f"Total Sharpe Ratio over {n_days} days: {sharpe_total:.4f}")